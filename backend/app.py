@@ -2,12 +2,21 @@ from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
-from models import db, User, FAQ, Category, Attachment, FAQRating, FAQFeedback
+from models import db
 from routes.auth import auth_bp
 from routes.faq import faq_bp
-from routes.upload import upload_file, serve_file, delete_file
+from routes.upload import (
+    upload_file, serve_file, delete_file, start_chunked_upload, get_chunked_upload,
+    upload_chunk, complete_chunked_upload, abort_chunked_upload
+)
 from routes.feedback import feedback_bp
 from config import config
+from compression import init_compression
+from metrics import init_metrics
+from health import init_health
+from database import build_engine_options, init_sqlite_pragmas
+from commands import register_commands, init_db
+from events import stream_events
 import os
 
 # Load environment variables
@@ -21,11 +30,16 @@ def create_app(config_name=None):
         config_name = os.environ.get('FLASK_CONFIG', 'default')
 
     app.config.from_object(config[config_name])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
 
     # Initialize extensions
     db.init_app(app)
+    init_sqlite_pragmas(app)
     CORS(app)
     jwt = JWTManager(app)
+    # Registered first so its after_request hook runs last and times compression too
+    init_metrics(app)
+    init_compression(app)
 
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -36,109 +50,26 @@ def create_app(config_name=None):
     app.route('/api/upload', methods=['POST'])(upload_file)
     app.route('/api/uploads/<filename>')(serve_file)
     app.route('/api/upload/<int:file_id>', methods=['DELETE'])(delete_file)
+    app.route('/api/upload/chunked', methods=['POST'])(start_chunked_upload)
+    app.route('/api/upload/chunked/<upload_id>', methods=['GET'])(get_chunked_upload)
+    app.route('/api/upload/chunked/<upload_id>', methods=['PUT'])(upload_chunk)
+    app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])(abort_chunked_upload)
+    app.route('/api/upload/chunked/<upload_id>/complete', methods=['POST'])(complete_chunked_upload)
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-
-        # Create default admin user if not exists
-        if app.config.get('ADMIN_USERNAME') and app.config.get('ADMIN_PASSWORD'):
-            if not User.query.filter_by(username=app.config['ADMIN_USERNAME']).first():
-                admin = User(
-                    username=app.config['ADMIN_USERNAME'],
-                    is_admin=True,
-                    email=app.config.get('ADMIN_EMAIL')
-                )
-                admin.set_password(app.config['ADMIN_PASSWORD'])
-                db.session.add(admin)
-                print(f"Created admin user: {app.config['ADMIN_USERNAME']}")
-            else:
-                print(f"Admin user already exists: {app.config['ADMIN_USERNAME']}")
-        else:
-            print("Admin credentials not configured. Set ADMIN_USERNAME and ADMIN_PASSWORD in .env file")
-
-        # Create default categories if not exists
-        default_categories = [
-            {
-                'name': 'installation',
-                'description': 'Panduan instalasi dan setup awal',
-                'icon': 'fas fa-download',
-                'color': '#2563eb',
-                'order': 1
-            },
-            {
-                'name': 'connection',
-                'description': 'Masalah jaringan dan API',
-                'icon': 'fas fa-network-wired',
-                'color': '#f59e0b',
-                'order': 2
-            },
-            {
-                'name': 'performance',
-                'description': 'Optimasi dan troubleshooting',
-                'icon': 'fas fa-tachometer-alt',
-                'color': '#10b981',
-                'order': 3
-            },
-            {
-                'name': 'detection',
-                'description': 'Face recognition, PPE, LPR',
-                'icon': 'fas fa-eye',
-                'color': '#ef4444',
-                'order': 4
-            }
-        ]
-
-        for cat_data in default_categories:
-            if not Category.query.filter_by(name=cat_data['name']).first():
-                category = Category(**cat_data)
-                db.session.add(category)
-
-        # TODO: Sample FAQs creation temporarily disabled due to schema changes
-        # Will be re-enabled after database migration is complete
-        """
-        sample_faqs = [
-            {
-                'question': 'Bagaimana cara instalasi VisionAIre Stream?',
-                'answer': '''Untuk instalasi VisionAIre Stream, ikuti langkah berikut:
-
-```bash
-# Download package
-wget https://releases.nodeflux.io/visionaire-stream/latest.tar.gz
-
-# Extract
-tar -xzf latest.tar.gz
-cd visionaire-stream
+    # Change notifications (server-sent events)
+    app.route('/api/events')(stream_events)
 
-# Setup configuration
-cp config.example.yaml config.yaml
-
-# Run dengan Docker Compose
-docker-compose up -d
-```
-
-Access http://localhost:8080 untuk verifikasi.''',
-                'category': 'installation',
-                'tags': 'installation,visionaire stream,docker,setup',
-                'order': 1
-            }
-        ]
-
-        for faq_data in sample_faqs:
-            if not FAQ.query.filter_by(question=faq_data['question']).first():
-                # Find admin user
-                admin_user = User.query.filter_by(username='admin').first()
-                faq_data['created_by'] = admin_user.id if admin_user else 1
-                faq = FAQ(**faq_data)
-                db.session.add(faq)
-        """
-
-        db.session.commit()
+    # Schema creation and seeding live in `flask init-db` so that starting a
+    # worker does no database I/O
+    register_commands(app)
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
         return {'status': 'healthy', 'message': 'Nodeflux FAQ API is running'}
 
+    # Liveness/readiness probes for load balancers
+    init_health(app)
+
     @app.errorhandler(404)
     def not_found(error):
         return {'error': 'Not found'}, 404
@@ -152,4 +83,7 @@ Access http://localhost:8080 untuk verifikasi.''',
 
 if __name__ == '__main__':
     app = create_app()
+    # Convenience for local development; production runs `flask init-db` once
+    with app.app_context():
+        init_db()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
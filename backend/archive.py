@@ -0,0 +1,160 @@
+"""Retention for soft-deleted FAQs.
+
+``delete_faq`` only flips ``is_active``. ``archive_deleted_faqs`` moves FAQs
+that have been inactive for a while, with their ratings, feedback and
+attachment rows, into the ``archive_*`` tables and removes the attachment
+files. Rows are moved with INSERT ... SELECT / DELETE in small batches, one
+short transaction per batch, so the job never holds the write lock for
+long. ``restore_faqs`` moves the latest archived copy of FAQs back; their
+attachment files are gone, so attachments are not restored.
+
+SQLite reuses the ids of deleted rows, so an id can be archived more than
+once and may be taken again when a FAQ is restored. Archive rows keep the
+hot table's id as ``original_id``; a restored row gets a new id if its
+original one is in use.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from models import db, FAQ, FAQRating, FAQFeedback, Attachment, FAQRelated, ARCHIVE_TABLES
+from events import publish
+
+logger = logging.getLogger('faq.archive')
+
+ARCHIVE = dict(ARCHIVE_TABLES)
+
+def _faq_key(model, table):
+    """Column linking rows of a (hot or archive) table to their FAQ"""
+    if model is not FAQ:
+        return table.c.faq_id
+    return table.c.original_id if 'original_id' in table.c else table.c.id
+
+def _archive(model, faq_ids, archived_at):
+    """Copy the hot rows of faq_ids into the archive, then delete them"""
+    source, target = model.__table__, ARCHIVE[model]
+    key = _faq_key(model, source)
+    columns = {name: source.c[name] for name in source.c.keys() if name in target.c}
+    columns['original_id'] = source.c.id
+    columns['archived_at'] = db.literal(archived_at, db.DateTime)
+    select = db.select(*columns.values()).where(key.in_(faq_ids))
+    db.session.execute(target.insert().from_select(list(columns), select))
+    return db.session.execute(source.delete().where(key.in_(faq_ids))).rowcount
+
+def _restore_row(model, row, **values):
+    """Insert an archived row into its hot table and return its id.
+
+    The original id is kept unless it has been reused since archiving.
+    """
+    table = model.__table__
+    data = {name: row[name] for name in table.c.keys() if name in row}
+    data.update(values)
+    taken = db.session.execute(db.select(table.c.id).where(table.c.id == row['original_id'])).first()
+    if not taken:
+        data['id'] = row['original_id']
+    return db.session.execute(table.insert().values(data)).inserted_primary_key[0]
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.exception('Could not remove archived attachment %s', path)
+
+def archivable_faq_ids(older_than_days, limit=None):
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    query = db.session.query(FAQ.id).filter(FAQ.is_active.is_(False), FAQ.updated_at < cutoff)\
+        .order_by(FAQ.id.asc())
+    if limit:
+        query = query.limit(limit)
+    return [faq_id for faq_id, in query]
+
+def archive_deleted_faqs(older_than_days, batch_size=50, pause=0.05, dry_run=False):
+    """Archive FAQs soft-deleted more than ``older_than_days`` ago.
+
+    Returns the number of rows moved per table.
+    """
+    moved = {target.name: 0 for _, target in ARCHIVE_TABLES}
+    if dry_run:
+        moved['archive_faq'] = len(archivable_faq_ids(older_than_days))
+        return moved
+
+    while True:
+        faq_ids = archivable_faq_ids(older_than_days, batch_size)
+        if not faq_ids:
+            break
+
+        archived_at = datetime.utcnow()
+        files = [path for path, in db.session.query(Attachment.file_path)
+                 .filter(Attachment.faq_id.in_(faq_ids))]
+        try:
+            db.session.query(FAQRelated).filter(db.or_(
+                FAQRelated.faq_id.in_(faq_ids), FAQRelated.related_faq_id.in_(faq_ids)
+            )).delete(synchronize_session=False)
+            for model, target in ARCHIVE_TABLES:
+                moved[target.name] += _archive(model, faq_ids, archived_at)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # Only after the commit, so a failed batch keeps its files
+        _remove_files(files)
+        if pause:
+            time.sleep(pause)
+
+    return moved
+
+def archived_faqs(limit=50):
+    table = ARCHIVE[FAQ]
+    rows = db.session.execute(
+        db.select(table.c.original_id.label('id'), table.c.question, table.c.category, table.c.archived_at)
+        .order_by(table.c.archived_at.desc(), table.c.archive_id.desc()).limit(limit)
+    )
+    return [dict(row._mapping) for row in rows]
+
+def restore_faqs(faq_ids):
+    """Move the latest archived copy of FAQs back into the hot tables as active FAQs.
+
+    Returns ``{archived id: restored id}``; the ids differ when the archived
+    id has been reused since. Ids that are not archived are ignored.
+    """
+    faq_table = ARCHIVE[FAQ]
+    latest = {}
+    for row in db.session.execute(
+        db.select(faq_table).where(faq_table.c.original_id.in_(list(faq_ids)))
+        .order_by(faq_table.c.archived_at.desc())
+    ).mappings():
+        latest.setdefault(row['original_id'], row)
+    if not latest:
+        return {}
+
+    restored = {}
+    restored_at = datetime.utcnow()
+    try:
+        for original_id, faq in latest.items():
+            faq_id = _restore_row(FAQ, faq, is_active=True, updated_at=restored_at)
+            rating_ids = {}
+            # Parents first; attachment rows are dropped, their files were removed
+            for model, table in reversed(ARCHIVE_TABLES):
+                copy = db.and_(_faq_key(model, table) == original_id,
+                               table.c.archived_at == faq['archived_at'])
+                if model is FAQRating or model is FAQFeedback:
+                    for row in db.session.execute(
+                        db.select(table).where(copy).order_by(table.c.archive_id)
+                    ).mappings():
+                        if model is FAQRating:
+                            rating_ids[row['original_id']] = _restore_row(model, row, faq_id=faq_id)
+                        else:
+                            _restore_row(model, row, faq_id=faq_id,
+                                         rating_id=rating_ids.get(row['rating_id'], row['rating_id']))
+                db.session.execute(table.delete().where(copy))
+            restored[original_id] = faq_id
+            publish('faq', id=faq_id, action='restored', version=restored_at.isoformat())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return restored
@@ -0,0 +1,345 @@
+"""ASGI entry point.
+
+    pip install uvicorn
+    uvicorn asgi:app --workers 4 --host 0.0.0.0 --port 5000
+
+Attachment downloads (/api/uploads/<filename>) and the event stream
+(/api/events) are served natively on the event loop: a slow client or an
+idle subscriber costs a coroutine, not a thread. Their short database
+lookups run on a small thread pool. Every other request goes to the Flask
+app (auth, faq, feedback and upload blueprints unchanged) on a bounded
+thread pool, so a burst of slow downloads can no longer starve logins or
+FAQ reads.
+
+Uses ProductionConfig unless FLASK_CONFIG says otherwise.
+"""
+import asyncio
+import mimetypes
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from app import create_app
+from models import db, Attachment
+from events import broker, backlog, LoopQueue
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_ROUTE_RE = re.compile(r'^/api/upload/chunked/[^/]+$')
+# Request bodies above this are spooled to a temporary file
+SPOOL_SIZE = 1024 * 1024
+
+class WSGIBridge:
+    """Run a WSGI app for ASGI requests on a bounded thread pool.
+
+    ``body_limit(scope)`` gives the largest request body accepted; bigger
+    ones get a 413 before the app runs.
+    """
+
+    def __init__(self, wsgi_app, executor, body_limit):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+        self.body_limit = body_limit
+
+    def build_environ(self, scope, body):
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('latin1'),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'SERVER_NAME': (scope.get('server') or ('localhost', 80))[0],
+            'SERVER_PORT': str((scope.get('server') or ('localhost', 80))[1]),
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin1').upper().replace('-', '_')
+            if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+                name = f'HTTP_{name}'
+            value = value.decode('latin1')
+            environ[name] = f'{environ[name]},{value}' if name in environ else value
+        return environ
+
+    @staticmethod
+    async def too_large(send):
+        body = b'{"error":"Request body too large"}'
+        await send({'type': 'http.response.start', 'status': 413, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+            (b'connection', b'close'), (b'access-control-allow-origin', b'*'),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def read_body(self, scope, receive, send):
+        """Request body as a file, or None when the request was answered or dropped"""
+        limit = self.body_limit(scope)
+        declared = dict(scope.get('headers', [])).get(b'content-length', b'')
+        if declared.isdigit() and int(declared) > limit:
+            await self.too_large(send)
+            return None
+
+        body = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > limit:
+                body.close()
+                await self.too_large(send)
+                return None
+            body.write(chunk)
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        return body
+
+    async def __call__(self, scope, receive, send):
+        body = await self.read_body(scope, receive, send)
+        if body is None:
+            return
+        try:
+            await self.run_app(scope, body, send)
+        finally:
+            body.close()
+
+    async def run_app(self, scope, body, send):
+        environ = self.build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+
+        def blocking_send(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = {}
+
+            def start_response(status, headers, exc_info=None):
+                started['message'] = {
+                    'type': 'http.response.start',
+                    'status': int(status.split(' ', 1)[0]),
+                    'headers': [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers],
+                }
+
+            result = self.wsgi_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if not chunk:
+                        continue
+                    if 'message' in started:
+                        blocking_send(started.pop('message'))
+                    blocking_send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if 'message' in started:
+                    blocking_send(started.pop('message'))
+                blocking_send({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        await loop.run_in_executor(self.executor, run)
+
+class AsgiApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.wsgi = WSGIBridge(flask_app.wsgi_app, ThreadPoolExecutor(
+            config.get('ASGI_WSGI_THREADS', 16), thread_name_prefix='wsgi'
+        ), self.body_limit)
+        self.db_executor = ThreadPoolExecutor(config.get('ASGI_DB_THREADS', 4), thread_name_prefix='asgi-db')
+        self.chunk_size = config.get('ASGI_FILE_CHUNK_SIZE', 256 * 1024)
+        self.routes = [
+            (re.compile(r'^/api/uploads/(?P<filename>[^/]+)$'), ('GET', 'HEAD'), self.serve_file),
+            (re.compile(r'^/api/events$'), ('GET',), self.stream_events),
+        ]
+
+    def body_limit(self, scope):
+        """MAX_CONTENT_LENGTH, or UPLOAD_MAX_CHUNK_SIZE for upload chunks"""
+        config = self.flask_app.config
+        if scope['method'] == 'PUT' and CHUNK_ROUTE_RE.match(scope['path']):
+            return config.get('UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024)
+        return config.get('MAX_CONTENT_LENGTH') or 17 * 1024 * 1024
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        for pattern, methods, handler in self.routes:
+            match = pattern.match(scope['path'])
+            if match and scope['method'] in methods:
+                return await handler(scope, receive, send, **match.groupdict())
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.wsgi.executor.shutdown(wait=False)
+                self.db_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run_db(self, fn, *args):
+        """Run a short database call off the event loop, inside an app context"""
+        def call():
+            with self.flask_app.app_context():
+                try:
+                    return fn(*args)
+                finally:
+                    db.session.remove()
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, call)
+
+    async def respond(self, send, status, body=b'', headers=()):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-length', str(len(body)).encode()), (b'access-control-allow-origin', b'*'),
+            *headers
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def serve_file(self, scope, receive, send, filename):
+        def lookup(name):
+            attachment = Attachment.query.filter_by(filename=name).first()
+            return attachment and (attachment.file_path, attachment.mime_type)
+
+        found = await self.run_db(lookup, filename)
+        if not found:
+            return await self.respond(send, 404, b'{"error":"File not found"}',
+                                      [(b'content-type', b'application/json')])
+
+        # Resolved like Flask's send_from_directory does
+        path = os.path.join(self.flask_app.root_path, found[0])
+        loop = asyncio.get_running_loop()
+        try:
+            f = await loop.run_in_executor(self.db_executor, open, path, 'rb')
+        except OSError:
+            return await self.respond(send, 404, b'{"error":"File not found"}',
+                                      [(b'content-type', b'application/json')])
+
+        try:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = f'"{int(stat.st_mtime)}-{size}"'
+            headers = dict((k.decode('latin1').lower(), v.decode('latin1')) for k, v in scope['headers'])
+            content_type = found[1] or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response_headers = [
+                (b'content-type', content_type.encode('latin1')),
+                (b'accept-ranges', b'bytes'),
+                (b'etag', etag.encode()),
+                (b'last-modified', formatdate(stat.st_mtime, usegmt=True).encode()),
+                (b'cache-control', b'no-cache'),
+            ]
+            if headers.get('if-none-match') == etag:
+                return await self.respond(send, 304, headers=response_headers)
+
+            # Single byte ranges let interrupted downloads resume
+            start, end, status = 0, size - 1, 200
+            match = RANGE_RE.match(headers.get('range', ''))
+            if match and match.group(1) + match.group(2):
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                else:
+                    start = max(size - int(match.group(2)), 0)
+                if start > end:
+                    return await self.respond(send, 416, headers=[
+                        (b'content-range', f'bytes */{size}'.encode())
+                    ])
+                status = 206
+                response_headers.append((b'content-range', f'bytes {start}-{end}/{size}'.encode()))
+
+            length = end - start + 1
+            await send({'type': 'http.response.start', 'status': status, 'headers': [
+                (b'content-length', str(length).encode()), (b'access-control-allow-origin', b'*'),
+                *response_headers
+            ]})
+            if scope['method'] == 'HEAD':
+                return await send({'type': 'http.response.body', 'body': b''})
+
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await loop.run_in_executor(
+                    self.db_executor, f.read, min(self.chunk_size, remaining)
+                )
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                # Awaiting send applies the client's backpressure
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0:
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            f.close()
+
+    async def stream_events(self, scope, receive, send):
+        config = self.flask_app.config
+        heartbeat = config.get('EVENTS_HEARTBEAT_SECONDS', 15)
+        loop = asyncio.get_running_loop()
+        q = LoopQueue(loop, config.get('EVENTS_QUEUE_SIZE', 100))
+        await self.run_db(broker.subscribe, self.flask_app, q)
+
+        try:
+            headers = dict((k.decode('latin1').lower(), v.decode('latin1')) for k, v in scope['headers'])
+            last_event_id = headers.get('last-event-id')
+            last_sent = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+            missed = await self.run_db(backlog, last_sent) if last_sent is not None else []
+            last_sent = last_sent or 0
+
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*'),
+            ]})
+
+            async def emit(text):
+                await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+            await emit(f'retry: {config.get("EVENTS_RETRY_MS", 3000)}\n\n')
+            for event_id, message in missed:
+                last_sent = event_id
+                await emit(message)
+
+            disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+            try:
+                while not disconnected.done():
+                    getter = asyncio.ensure_future(q.queue.get())
+                    done, _ = await asyncio.wait({getter, disconnected}, timeout=heartbeat,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if getter not in done:
+                        getter.cancel()
+                        if not disconnected.done():
+                            await emit(': keep-alive\n\n')
+                        continue
+                    item = getter.result()
+                    if item is None:
+                        break
+                    event_id, message = item
+                    if event_id <= last_sent:
+                        continue
+                    last_sent = event_id
+                    await emit(message)
+            finally:
+                disconnected.cancel()
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            broker.unsubscribe(q)
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+app = AsgiApp(create_app(os.environ.get('FLASK_CONFIG', 'production')))
@@ -0,0 +1,105 @@
+"""Synthetic dataset generator for benchmarks.
+
+Rows are generated from a seeded RNG so two runs with the same arguments
+produce the same database.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+from models import db, User, FAQ, Category, Attachment, FAQRating, FAQFeedback
+
+WORDS = [
+    'visionaire', 'stream', 'docker', 'install', 'camera', 'rtsp', 'lpr', 'ppe',
+    'face', 'recognition', 'license', 'plate', 'gpu', 'nvidia', 'driver', 'cuda',
+    'api', 'token', 'network', 'latency', 'timeout', 'dashboard', 'analytics',
+    'vehicle', 'counting', 'crowd', 'helmet', 'vest', 'database', 'postgres',
+    'kubernetes', 'deployment', 'upgrade', 'backup', 'restore', 'log', 'error',
+    'snapshot', 'frame', 'fps', 'resolution', 'pipeline', 'webhook', 'alert',
+]
+
+def sentence(rng, min_words, max_words):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return ' '.join(words).capitalize()
+
+def answer_text(rng):
+    paragraphs = [sentence(rng, 20, 60) + '.' for _ in range(rng.randint(1, 4))]
+    if rng.random() < 0.5:
+        paragraphs.append('```bash\n' + '\n'.join(
+            f'docker run nodeflux/{rng.choice(WORDS)}:latest --{rng.choice(WORDS)}'
+            for _ in range(rng.randint(2, 10))
+        ) + '\n```')
+    return '\n\n'.join(paragraphs)
+
+def seed_dataset(faqs=1000, categories=8, tags=50, ratings=5000, feedbacks=1000,
+                 attachments=200, upload_dir='uploads/documents', seed=42):
+    """Fill an empty database with synthetic data. Returns the admin user."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    admin = User.query.filter_by(username='bench-admin').first()
+    if admin is None:
+        admin = User(username='bench-admin', is_admin=True)
+        admin.set_password('BenchAdmin123!')
+        db.session.add(admin)
+        db.session.commit()
+
+    category_names = [f'category-{i}' for i in range(categories)]
+    db.session.execute(Category.__table__.insert(), [
+        {'name': name, 'description': sentence(rng, 3, 8), 'icon': 'fas fa-question',
+         'color': '#2563eb', 'order': i, 'is_active': True}
+        for i, name in enumerate(category_names)
+    ])
+
+    tag_pool = [f'{rng.choice(WORDS)}-{i}' for i in range(tags)]
+    faq_rows = []
+    for i in range(faqs):
+        created_at = now - timedelta(days=rng.randint(0, 730), seconds=rng.randint(0, 86400))
+        faq_rows.append({
+            'question': sentence(rng, 4, 12) + '?',
+            'answer': answer_text(rng),
+            'category': rng.choice(category_names),
+            'tags': ','.join(rng.sample(tag_pool, k=min(len(tag_pool), rng.randint(1, 5)))),
+            'is_active': rng.random() > 0.05,
+            'order': i,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'created_by': admin.id,
+        })
+    db.session.execute(FAQ.__table__.insert(), faq_rows)
+
+    faq_ids = [row[0] for row in db.session.query(FAQ.id).all()]
+
+    if ratings:
+        db.session.execute(FAQRating.__table__.insert(), [
+            {'faq_id': rng.choice(faq_ids), 'rating': rng.randint(1, 5),
+             'ip_address': f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}',
+             'created_at': now - timedelta(minutes=rng.randint(0, 500000))}
+            for i in range(ratings)
+        ])
+
+    if feedbacks:
+        db.session.execute(FAQFeedback.__table__.insert(), [
+            {'faq_id': rng.choice(faq_ids), 'feedback_text': sentence(rng, 5, 40),
+             'ip_address': '127.0.0.1', 'is_helpful': rng.random() > 0.3,
+             'created_at': now - timedelta(minutes=rng.randint(0, 500000))}
+            for _ in range(feedbacks)
+        ])
+
+    if attachments:
+        os.makedirs(upload_dir, exist_ok=True)
+        rows = []
+        for i in range(attachments):
+            filename = f'bench-{i}.txt'
+            file_path = os.path.join(upload_dir, filename)
+            body = (sentence(rng, 50, 200) + '\n').encode('utf-8')
+            with open(file_path, 'wb') as f:
+                f.write(body)
+            rows.append({
+                'filename': filename, 'original_filename': filename, 'file_path': file_path,
+                'file_size': len(body), 'mime_type': 'text/plain', 'file_type': 'document',
+                'faq_id': rng.choice(faq_ids), 'created_at': now,
+            })
+        db.session.execute(Attachment.__table__.insert(), rows)
+
+    db.session.commit()
+    return admin
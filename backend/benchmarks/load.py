@@ -0,0 +1,198 @@
+"""Concurrent-connection load test: WSGI (gunicorn) vs ASGI (uvicorn).
+
+Usage (from the backend directory, with gunicorn and uvicorn installed):
+
+    python -m benchmarks.load --connections 200 --duration 15 --output load.json
+
+Both servers run the same app with the same number of worker processes.
+``--connections`` clients download a large attachment slowly (like
+engineers on a site VPN) while a probe client requests the FAQ list in a
+loop. The report shows how many downloads were being served, how many
+were left waiting, and the probe's latency and timeouts for each server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.run import percentile, git_revision
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def prepare(workdir, file_size, faqs):
+    """Seed a database with FAQs and one large attachment"""
+    from app import create_app
+    from commands import init_db
+    from models import db, Attachment
+    from benchmarks.dataset import seed_dataset
+
+    path = os.path.join(workdir, 'large.bin')
+    with open(path, 'wb') as f:
+        f.write(os.urandom(file_size))
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        seed_dataset(faqs=faqs, attachments=0)
+        db.session.add(Attachment(filename='large.bin', original_filename='large.bin', file_path=path,
+                                  file_size=file_size, mime_type='application/octet-stream',
+                                  file_type='other'))
+        db.session.commit()
+
+def server_command(mode, port, workers, threads):
+    if mode == 'wsgi':
+        return ['gunicorn', '-w', str(workers), '--threads', str(threads),
+                '-b', f'127.0.0.1:{port}', 'wsgi:app']
+    return ['uvicorn', 'asgi:app', '--workers', str(workers), '--port', str(port),
+            '--log-level', 'warning']
+
+async def http_get(port, path, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+    return reader, writer, int(head.split(b' ', 2)[1])
+
+async def slow_download(port, stop, stats, header_timeout, read_size, read_interval):
+    try:
+        reader, writer, status = await http_get(port, '/api/uploads/large.bin', header_timeout)
+    except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError):
+        stats['waiting'] += 1
+        return
+    stats['served' if status == 200 else 'errors'] += 1
+    try:
+        while not stop.is_set():
+            chunk = await reader.read(read_size)
+            if not chunk:
+                break
+            stats['bytes'] += len(chunk)
+            await asyncio.sleep(read_interval)
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+async def probe(port, stop, latencies, stats, timeout):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            reader, writer, status = await http_get(port, '/api/faqs?view=summary', timeout)
+            await asyncio.wait_for(reader.read(), timeout)
+            writer.close()
+            latencies.append(time.perf_counter() - started)
+        except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError):
+            stats['probe_timeouts'] += 1
+        await asyncio.sleep(0.05)
+
+async def run_load(port, args):
+    stop = asyncio.Event()
+    stats = {'served': 0, 'waiting': 0, 'errors': 0, 'bytes': 0, 'probe_timeouts': 0}
+    latencies = []
+    tasks = [asyncio.ensure_future(probe(port, stop, latencies, stats, args.timeout))]
+    for _ in range(args.connections):
+        tasks.append(asyncio.ensure_future(slow_download(
+            port, stop, stats, args.timeout, args.read_size, args.read_interval
+        )))
+        await asyncio.sleep(args.ramp / args.connections)
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.wait(tasks, timeout=args.timeout + 5)
+
+    latencies.sort()
+    return {
+        'downloads_served': stats['served'],
+        'downloads_waiting': stats['waiting'],
+        'download_errors': stats['errors'],
+        'downloaded_mb': round(stats['bytes'] / 1024 / 1024, 1),
+        'probe_requests': len(latencies),
+        'probe_timeouts': stats['probe_timeouts'],
+        'probe_p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'probe_p99_ms': round(percentile(latencies, 99) * 1000, 1),
+    }
+
+def wait_until_up(port, proc, timeout=30):
+    import urllib.request
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError('server exited during startup')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+def compare_servers(args, workdir):
+    """Run the load against each server in turn; the database lives in workdir"""
+    env = dict(os.environ,
+               DATABASE_URL=f'sqlite:///{os.path.join(workdir, "load.db")}',
+               FLASK_CONFIG='production', RESPONSE_CACHE_TTL='0',
+               PYTHONPATH=BACKEND_DIR)
+    env.pop('ADMIN_USERNAME', None)
+    env.pop('ADMIN_PASSWORD', None)
+    os.environ.update({'DATABASE_URL': env['DATABASE_URL']})
+    prepare(workdir, args.file_mb * 1024 * 1024, args.faqs)
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(',')]:
+        proc = subprocess.Popen(server_command(mode, args.port, args.workers, args.threads),
+                                cwd=BACKEND_DIR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(args.port, proc)
+            results[mode] = asyncio.run(run_load(args.port, args))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f'{mode}: {json.dumps(results[mode])}', file=sys.stderr)
+
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare concurrent-connection capacity of WSGI and ASGI')
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15, help='Seconds to hold the downloads open')
+    parser.add_argument('--ramp', type=float, default=2, help='Seconds over which connections open')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (both servers)')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker')
+    parser.add_argument('--file-mb', type=int, default=50)
+    parser.add_argument('--read-size', type=int, default=16 * 1024)
+    parser.add_argument('--read-interval', type=float, default=0.1)
+    parser.add_argument('--timeout', type=float, default=5)
+    parser.add_argument('--faqs', type=int, default=500)
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='faq-load-') as workdir:
+        results = compare_servers(args, workdir)
+
+    report = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {
+            'connections': args.connections, 'duration': args.duration, 'workers': args.workers,
+            'gunicorn_threads': args.threads, 'file_mb': args.file_mb,
+            'client_read_kb_per_s': round(args.read_size / args.read_interval / 1024),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""Benchmark the API against a synthetic dataset.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.run --faqs 5000 --iterations 200 --output bench.json
+
+The app is driven in-process through the Flask test client. Latency
+percentiles, throughput and SQL statement counts (from the Server-Timing
+header) are written as JSON so runs can be compared across commits.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+QUERY_COUNT_RE = re.compile(r'desc="(\d+) queries"')
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def build_scenarios(ctx):
+    rng = ctx['rng']
+
+    def pick_faq():
+        return rng.choice(ctx['faq_ids'])
+
+    def pick_word():
+        return rng.choice(ctx['words'])
+
+    def pick_typo():
+        word = pick_word()
+        i = rng.randrange(len(word) - 1)
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+    return {
+        'list': lambda c: c.get('/api/faqs'),
+        'list_summary': lambda c: c.get('/api/faqs?view=summary'),
+        'list_page_5': lambda c: c.get('/api/faqs?page=5&per_page=20'),
+        'search': lambda c: c.get(f'/api/faqs?search={pick_word()}'),
+        'search_typo': lambda c: c.get(f'/api/faqs?search={pick_typo()}'),
+        'filter_category': lambda c: c.get(f'/api/faqs?category={rng.choice(ctx["categories"])}'),
+        'filter_tags': lambda c: c.get(f'/api/faqs?tags={rng.choice(ctx["tags"])}'),
+        'filter_min_rating': lambda c: c.get('/api/faqs?min_rating=3'),
+        'filter_attachments': lambda c: c.get('/api/faqs?has_attachments=1'),
+        'sort_newest': lambda c: c.get('/api/faqs?sort_by=newest'),
+        'sort_rating': lambda c: c.get('/api/faqs?sort_by=rating&sort_order=desc'),
+        'sort_relevance': lambda c: c.get(f'/api/faqs?sort_by=relevance&search={pick_word()}'),
+        'suggest': lambda c: c.get(f'/api/faqs/suggest?q={pick_word()[:rng.randint(1, 4)]}'),
+        'detail': lambda c: c.get(f'/api/faqs/{pick_faq()}'),
+        'rating_write': lambda c: c.post(
+            f'/api/faqs/{pick_faq()}/rating', json={'rating': rng.randint(1, 5)},
+            headers={'X-Forwarded-For': f'192.168.{rng.randint(0, 255)}.{rng.randint(0, 255)}'}
+        ),
+        'stats': lambda c: c.get('/api/stats'),
+        'categories': lambda c: c.get('/api/categories'),
+        'upload': lambda c: c.post(
+            '/api/upload', headers=ctx['auth'], content_type='multipart/form-data',
+            data={'file': (io.BytesIO(b'x' * 4096), 'bench.txt')}
+        ),
+        'download': lambda c: c.get(f'/api/uploads/{rng.choice(ctx["filenames"])}'),
+    }
+
+def run_scenario(client, fn, iterations, warmup):
+    for _ in range(warmup):
+        fn(client)
+
+    latencies = []
+    queries = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        response = fn(client)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            errors += 1
+        match = QUERY_COUNT_RE.search(response.headers.get('Server-Timing', ''))
+        if match:
+            queries.append(int(match.group(1)))
+        response.close()
+    total = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0,
+        'throughput_rps': round(iterations / total, 1) if total else 0,
+        'queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    }
+
+def run_benchmarks(args, parser, workdir):
+    """Seed a database in workdir, run the scenarios and return the report"""
+    # Config is read from the environment at import time
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    os.environ['RESPONSE_CACHE_TTL'] = os.environ.get('RESPONSE_CACHE_TTL', '30') if args.cache else '0'
+    os.environ['SLOW_QUERY_THRESHOLD_MS'] = '0'
+    # Statement counts are read from Server-Timing
+    os.environ['SERVER_TIMING_PUBLIC'] = 'true'
+    os.environ.pop('ADMIN_USERNAME', None)
+    os.environ.pop('ADMIN_PASSWORD', None)
+    os.chdir(workdir)
+
+    from app import create_app
+    from commands import init_db
+    from models import db, FAQ, Category, Attachment
+    from benchmarks.dataset import seed_dataset, WORDS
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        seed_started = time.perf_counter()
+        seed_dataset(faqs=args.faqs, categories=args.categories, tags=args.tags,
+                     ratings=args.ratings, feedbacks=args.feedbacks,
+                     attachments=args.attachments, seed=args.seed)
+        seed_seconds = time.perf_counter() - seed_started
+
+        ctx = {
+            'rng': random.Random(args.seed),
+            'words': WORDS,
+            'faq_ids': [row[0] for row in db.session.query(FAQ.id).filter_by(is_active=True)],
+            'categories': [row[0] for row in db.session.query(Category.name)],
+            'tags': sorted({t for (tags,) in db.session.query(FAQ.tags) for t in (tags or '').split(',') if t}),
+            'filenames': [row[0] for row in db.session.query(Attachment.filename)] or ['missing.txt'],
+        }
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'username': 'bench-admin', 'password': 'BenchAdmin123!'})
+    ctx['auth'] = {'Authorization': f'Bearer {login.get_json()["access_token"]}'}
+
+    scenarios = build_scenarios(ctx)
+    if args.scenarios:
+        wanted = [name.strip() for name in args.scenarios.split(',')]
+        unknown = [name for name in wanted if name not in scenarios]
+        if unknown:
+            parser.error(f'Unknown scenarios: {", ".join(unknown)}')
+        scenarios = {name: scenarios[name] for name in wanted}
+
+    results = {}
+    for name, fn in scenarios.items():
+        results[name] = run_scenario(client, fn, args.iterations, args.warmup)
+        print(f'{name:20s} p50={results[name]["p50_ms"]:8.2f}ms '
+              f'p99={results[name]["p99_ms"]:8.2f}ms '
+              f'queries={results[name]["queries_mean"]}', file=sys.stderr)
+
+    report = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': {
+            'faqs': args.faqs, 'categories': args.categories, 'tags': args.tags,
+            'ratings': args.ratings, 'feedbacks': args.feedbacks,
+            'attachments': args.attachments, 'seed': args.seed,
+            'seed_seconds': round(seed_seconds, 3),
+        },
+        'iterations': args.iterations,
+        'response_cache': args.cache,
+        'results': results,
+    }
+    with app.app_context():
+        db.engine.dispose()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the FAQ API')
+    parser.add_argument('--faqs', type=int, default=1000)
+    parser.add_argument('--categories', type=int, default=8)
+    parser.add_argument('--tags', type=int, default=50)
+    parser.add_argument('--ratings', type=int, default=5000)
+    parser.add_argument('--feedbacks', type=int, default=1000)
+    parser.add_argument('--attachments', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scenarios', help='Comma separated subset of scenarios to run')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    # Relative to the caller's directory, not the temporary one
+    output_path = os.path.abspath(args.output) if args.output else None
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='faq-bench-') as workdir:
+        try:
+            report = run_benchmarks(args, parser, workdir)
+        finally:
+            os.chdir(previous_dir)
+
+    output = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
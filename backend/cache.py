@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, g
+from compression import choose_encoding, compress
+
+class CachedResponse:
+    """A cached response body plus its lazily built compressed variants"""
+
+    def __init__(self, body, mimetype, expires_at, meta=None, tags=()):
+        self.body = body
+        self.mimetype = mimetype
+        self.expires_at = expires_at
+        self.meta = meta
+        self.tags = frozenset(tags)
+        self.variants = {}
+
+    def encoded(self, encoding):
+        if encoding not in self.variants:
+            self.variants[encoding] = compress(self.body, encoding)
+        return self.variants[encoding]
+
+class ResponseCache:
+    """Small per-process LRU cache with a TTL.
+
+    Every worker has its own copy, so the TTL bounds how long another worker
+    may serve a stale page after a write.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, max_entries):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, *tags):
+        """Drop only the entries labelled with any of ``tags``"""
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.tags & tags]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+response_cache = ResponseCache()
+
+def tag_response(*tags):
+    """Label the response being built, so writes can invalidate it by tag"""
+    g.cache_tags = g.get('cache_tags', set()) | set(tags)
+
+def build_response(entry, cache_status):
+    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    response.headers['X-Cache'] = cache_status
+
+    if len(entry.body) >= current_app.config.get('COMPRESSION_MIN_SIZE', 1024):
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+        if encoding:
+            response.set_data(entry.encoded(encoding))
+            response.headers['Content-Encoding'] = encoding
+
+    return response
+
+def cached_response(view):
+    """Cache successful responses of a public GET view, keyed by URL.
+
+    Compressed bodies are stored with the entry, so a hot page is compressed
+    once per encoding instead of once per request.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        ttl = current_app.config.get('RESPONSE_CACHE_TTL', 0)
+        # Admin profiling runs (see metrics.py) must execute the view
+        if not ttl or g.get('profiler') is not None:
+            return view(*args, **kwargs)
+
+        key = request.full_path
+        entry = response_cache.get(key)
+        if entry is not None:
+            # Replay what the view noted about the response, e.g. result counts
+            g.response_meta = entry.meta
+            return build_response(entry, 'HIT')
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+
+        entry = CachedResponse(response.get_data(), response.mimetype, time.monotonic() + ttl,
+                               g.get('response_meta'), g.get('cache_tags', ()))
+        response_cache.set(key, entry, current_app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+        return build_response(entry, 'MISS')
+
+    return wrapper
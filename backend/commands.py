@@ -0,0 +1,246 @@
+import click
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Category, FAQ
+
+DEFAULT_CATEGORIES = [
+    {
+        'name': 'installation',
+        'description': 'Panduan instalasi dan setup awal',
+        'icon': 'fas fa-download',
+        'color': '#2563eb',
+        'order': 1
+    },
+    {
+        'name': 'connection',
+        'description': 'Masalah jaringan dan API',
+        'icon': 'fas fa-network-wired',
+        'color': '#f59e0b',
+        'order': 2
+    },
+    {
+        'name': 'performance',
+        'description': 'Optimasi dan troubleshooting',
+        'icon': 'fas fa-tachometer-alt',
+        'color': '#10b981',
+        'order': 3
+    },
+    {
+        'name': 'detection',
+        'description': 'Face recognition, PPE, LPR',
+        'icon': 'fas fa-eye',
+        'color': '#ef4444',
+        'order': 4
+    }
+]
+
+def _insert_once(obj):
+    """Insert a seed row, tolerating a concurrent run that inserted it first"""
+    db.session.add(obj)
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def seed_admin():
+    username = current_app.config.get('ADMIN_USERNAME')
+    password = current_app.config.get('ADMIN_PASSWORD')
+    if not username or not password:
+        click.echo('Admin credentials not configured. Set ADMIN_USERNAME and ADMIN_PASSWORD in .env file')
+        return
+
+    if User.query.filter_by(username=username).first():
+        click.echo(f'Admin user already exists: {username}')
+        return
+
+    admin = User(username=username, is_admin=True, email=current_app.config.get('ADMIN_EMAIL'))
+    admin.set_password(password)
+    if _insert_once(admin):
+        click.echo(f'Created admin user: {username}')
+
+def seed_categories():
+    existing = {name for (name,) in db.session.query(Category.name)}
+    for cat_data in DEFAULT_CATEGORIES:
+        if cat_data['name'] not in existing:
+            _insert_once(Category(**cat_data))
+
+def add_missing_columns():
+    """Add nullable columns that were introduced after a table was created.
+
+    The project has no migrations yet; this keeps existing databases
+    working with newer models.
+    """
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or column.primary_key or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(db.text(
+                f'ALTER TABLE {preparer.quote(table.name)} '
+                f'ADD COLUMN {preparer.quote(column.name)} {column_type}'
+            ))
+            click.echo(f'Added column {table.name}.{column.name}')
+    db.session.commit()
+
+def add_missing_indexes():
+    """Create indexes declared on models that existing tables don't have yet"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def upgrade_archive_tables():
+    """Rebuild archive tables created before they had their own primary key.
+
+    Those copied the hot table's id as primary key, which fails once an id
+    is reused and archived again.
+    """
+    from models import ARCHIVE_TABLES
+
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    for _, table in ARCHIVE_TABLES:
+        if 'original_id' in {column['name'] for column in inspector.get_columns(table.name)}:
+            continue
+        old_name = f'{table.name}_old'
+        # Index names stay with the renamed table and would clash with the new ones
+        for index in inspector.get_indexes(table.name):
+            db.session.execute(db.text(f'DROP INDEX {preparer.quote(index["name"])}'))
+        db.session.execute(db.text(
+            f'ALTER TABLE {preparer.quote(table.name)} RENAME TO {preparer.quote(old_name)}'
+        ))
+        db.session.commit()
+        table.create(bind=db.engine)
+        columns = [name for name in table.c.keys() if name not in ('archive_id', 'original_id')]
+        db.session.execute(db.text(
+            f'INSERT INTO {preparer.quote(table.name)} '
+            f'(original_id, {", ".join(map(preparer.quote, columns))}) '
+            f'SELECT id, {", ".join(map(preparer.quote, columns))} FROM {preparer.quote(old_name)}'
+        ))
+        db.session.execute(db.text(f'DROP TABLE {preparer.quote(old_name)}'))
+        db.session.commit()
+        click.echo(f'Rebuilt {table.name} with an archive_id primary key')
+
+def init_db():
+    """Create missing tables and seed the admin user and default categories.
+
+    Safe to run repeatedly and from several processes at once.
+    """
+    from fulltext import init_feedback_search
+
+    db.create_all()
+    upgrade_archive_tables()
+    add_missing_columns()
+    add_missing_indexes()
+    init_feedback_search()
+    seed_admin()
+    seed_categories()
+
+@click.command('init-db')
+def init_db_command():
+    """Create tables and seed default data."""
+    init_db()
+    click.echo('Database initialized')
+
+@click.command('compute-related')
+def compute_related_command():
+    """Recompute related-FAQ recommendations for every FAQ."""
+    from related import compute_all_related
+
+    count = compute_all_related()
+    click.echo(f'Computed related FAQs for {count} FAQs')
+
+@click.command('render-answers')
+@click.option('--all', 'render_all', is_flag=True, help='Re-render answers that already have HTML.')
+@click.option('--batch-size', default=200, show_default=True)
+def render_answers_command(render_all, batch_size):
+    """Backfill pre-rendered HTML for FAQ answers."""
+    from rendering import render_faq_answer
+
+    query = FAQ.query.order_by(FAQ.id.asc())
+    if not render_all:
+        query = query.filter(FAQ.answer_html.is_(None))
+
+    rendered = 0
+    last_id = 0
+    while True:
+        batch = query.filter(FAQ.id > last_id).limit(batch_size).all()
+        if not batch:
+            break
+        for faq in batch:
+            render_faq_answer(faq)
+        last_id = batch[-1].id
+        rendered += len(batch)
+        db.session.commit()
+
+    click.echo(f'Rendered {rendered} answers')
+
+@click.command('export-static')
+@click.argument('output_dir')
+@click.option('--full', is_flag=True, help='Rewrite every file instead of only changed FAQs.')
+@click.option('--per-page', default=20, show_default=True)
+@click.option('--workers', type=int, default=None, help='Writer processes (default: CPU count).')
+def export_static_command(output_dir, full, per_page, workers):
+    """Export the public FAQ data as static JSON files."""
+    from snapshot import export_snapshot
+
+    result = export_snapshot(output_dir, per_page=per_page, workers=workers, full=full)
+    click.echo(
+        f"Wrote {result['faqs_written']} FAQs ({result['faqs_removed']} removed), "
+        f"{result['files_written']} files, {result['attachments_copied']} attachments"
+    )
+
+@click.command('archive-faqs')
+@click.option('--days', type=int, default=None, help='Minimum age of the soft delete (default: FAQ_ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='FAQs per transaction (default: FAQ_ARCHIVE_BATCH_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Only count the FAQs that would be archived.')
+def archive_faqs_command(days, batch_size, dry_run):
+    """Move long soft-deleted FAQs and their dependents to the archive tables."""
+    from archive import archive_deleted_faqs
+
+    config = current_app.config
+    moved = archive_deleted_faqs(
+        days if days is not None else config.get('FAQ_ARCHIVE_AFTER_DAYS', 30),
+        batch_size=batch_size or config.get('FAQ_ARCHIVE_BATCH_SIZE', 50),
+        dry_run=dry_run,
+    )
+    if dry_run:
+        click.echo(f"{moved['archive_faq']} FAQs would be archived")
+    else:
+        click.echo(', '.join(f'{count} {table}' for table, count in moved.items()) + ' rows archived')
+
+@click.command('restore-faq')
+@click.argument('faq_ids', nargs=-1, type=int)
+@click.option('--list', 'list_archived', is_flag=True, help='List recently archived FAQs instead.')
+def restore_faq_command(faq_ids, list_archived):
+    """Restore archived FAQs (without their attachments) as active FAQs."""
+    from archive import archived_faqs, restore_faqs
+    from related import refresh_related
+
+    if list_archived or not faq_ids:
+        for row in archived_faqs():
+            click.echo(f"{row['id']}\t{row['archived_at']:%Y-%m-%d}\t{row['category']}\t{row['question'][:60]}")
+        return
+
+    restored = restore_faqs(faq_ids)
+    if restored:
+        refresh_related(list(restored.values()))
+    for original_id, faq_id in restored.items():
+        if faq_id != original_id:
+            click.echo(f'FAQ {original_id} was restored as {faq_id}, its id had been reused')
+    missing = sorted(set(faq_ids) - set(restored))
+    click.echo(f'Restored {len(restored)} FAQs' + (f', not archived: {missing}' if missing else ''))
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(compute_related_command)
+    app.cli.add_command(render_answers_command)
+    app.cli.add_command(export_static_command)
+    app.cli.add_command(archive_faqs_command)
+    app.cli.add_command(restore_faq_command)
@@ -0,0 +1,81 @@
+import gzip
+import threading
+import time
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css',
+                          'application/javascript')
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def choose_encoding():
+    """Pick the best encoding the client accepts, or None"""
+    if not current_app.config.get('COMPRESSION_ENABLED', True):
+        return None
+    return request.accept_encodings.best_match(supported_encodings())
+
+def compress(body, encoding):
+    """Compress ``body`` and record time and ratio for the metrics endpoint"""
+    start = time.perf_counter()
+    if encoding == 'br':
+        data = brotli.compress(body, quality=current_app.config.get('BROTLI_QUALITY', 5))
+    else:
+        data = gzip.compress(body, compresslevel=current_app.config.get('GZIP_LEVEL', 6), mtime=0)
+    elapsed = time.perf_counter() - start
+
+    with _stats_lock:
+        stats = _stats.setdefault(encoding, {
+            'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0
+        })
+        stats['responses'] += 1
+        stats['bytes_in'] += len(body)
+        stats['bytes_out'] += len(data)
+        stats['seconds'] += elapsed
+
+    return data
+
+def compression_stats():
+    """Snapshot of compression counters per encoding"""
+    with _stats_lock:
+        result = {}
+        for encoding, stats in _stats.items():
+            result[encoding] = dict(stats)
+            result[encoding]['ratio'] = (
+                round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else 0
+            )
+        return result
+
+def should_compress(response):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code >= 300:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    return response.calculate_content_length() >= current_app.config.get('COMPRESSION_MIN_SIZE', 1024)
+
+def init_compression(app):
+    """Compress API responses on the fly according to Accept-Encoding"""
+
+    @app.after_request
+    def compress_response(response):
+        if not should_compress(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+        if encoding:
+            response.set_data(compress(response.get_data(), encoding))
+            response.headers['Content-Encoding'] = encoding
+        return response
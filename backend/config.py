@@ -17,12 +17,116 @@ class Config:
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD')
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL')
 
+    # Response compression (br is used when the brotli package is installed)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+    # Per-process cache for public FAQ reads, 0 disables it
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 30))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+
+    # In-memory search indexes (autocomplete, fuzzy search): how often a
+    # worker checks whether other workers changed FAQs
+    SUGGEST_REFRESH_SECONDS = int(os.environ.get('SUGGEST_REFRESH_SECONDS', 10))
+    FUZZY_SIMILARITY_THRESHOLD = float(os.environ.get('FUZZY_SIMILARITY_THRESHOLD', 0.3))
+    # Jaccard similarity of question shingles above which FAQs are reported as duplicates
+    DUPLICATE_SIMILARITY_THRESHOLD = float(os.environ.get('DUPLICATE_SIMILARITY_THRESHOLD', 0.6))
+
+    # Related-FAQ recommendations (related.py)
+    RELATED_FAQS_ENABLED = os.environ.get('RELATED_FAQS_ENABLED', 'true').lower() == 'true'
+    RELATED_FAQS_K = int(os.environ.get('RELATED_FAQS_K', 10))
+    RELATED_FAQS_MIN_SCORE = float(os.environ.get('RELATED_FAQS_MIN_SCORE', 0.05))
+    # Terms in more than this share of FAQs are ignored as stopwords
+    RELATED_FAQS_MAX_DF = float(os.environ.get('RELATED_FAQS_MAX_DF', 0.5))
+    # Seconds without FAQ writes before queued recommendation refreshes run
+    RELATED_REFRESH_DELAY = float(os.environ.get('RELATED_REFRESH_DELAY', 5))
+
+    # Server-sent events (events.py)
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1.0))
+    EVENTS_HEARTBEAT_SECONDS = int(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_RETENTION_SECONDS = int(os.environ.get('EVENTS_RETENTION_SECONDS', 3600))
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+
+    # ASGI serving mode (asgi.py): threads for requests handled by Flask, for
+    # short database lookups, and the read size when streaming attachments
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 16))
+    ASGI_DB_THREADS = int(os.environ.get('ASGI_DB_THREADS', 4))
+    ASGI_FILE_CHUNK_SIZE = int(os.environ.get('ASGI_FILE_CHUNK_SIZE', 256 * 1024))
+
+    # Search analytics (search_analytics.py): in-memory aggregates flushed to search_stat
+    SEARCH_ANALYTICS_ENABLED = os.environ.get('SEARCH_ANALYTICS_ENABLED', 'true').lower() == 'true'
+    SEARCH_ANALYTICS_FLUSH_SECONDS = int(os.environ.get('SEARCH_ANALYTICS_FLUSH_SECONDS', 60))
+    SEARCH_ANALYTICS_TOP_K = int(os.environ.get('SEARCH_ANALYTICS_TOP_K', 100))
+    SEARCH_ANALYTICS_SKETCH_WIDTH = int(os.environ.get('SEARCH_ANALYTICS_SKETCH_WIDTH', 2048))
+    SEARCH_ANALYTICS_SKETCH_DEPTH = int(os.environ.get('SEARCH_ANALYTICS_SKETCH_DEPTH', 4))
+    SEARCH_ANALYTICS_RETENTION_DAYS = int(os.environ.get('SEARCH_ANALYTICS_RETENTION_DAYS', 90))
+
+    # Chunked uploads (routes/upload.py); single-request uploads stay capped at 10 MB
+    CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', 1024 * 1024 * 1024))
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024))
+    # Largest request body: one upload chunk or a single 10 MB upload, plus form overhead
+    MAX_CONTENT_LENGTH = int(os.environ.get(
+        'MAX_CONTENT_LENGTH', max(UPLOAD_MAX_CHUNK_SIZE, 10 * 1024 * 1024) + 1024 * 1024
+    ))
+    UPLOAD_SESSION_TTL_HOURS = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24))
+
+    # Retention of soft-deleted FAQs (flask archive-faqs)
+    FAQ_ARCHIVE_AFTER_DAYS = int(os.environ.get('FAQ_ARCHIVE_AFTER_DAYS', 30))
+    FAQ_ARCHIVE_BATCH_SIZE = int(os.environ.get('FAQ_ARCHIVE_BATCH_SIZE', 50))
+
+    # Health probes (health.py)
+    HEALTH_DB_TIMEOUT = float(os.environ.get('HEALTH_DB_TIMEOUT', 1.0))
+    HEALTH_CACHE_SECONDS = float(os.environ.get('HEALTH_CACHE_SECONDS', 2.0))
+    HEALTH_MIN_FREE_MB = int(os.environ.get('HEALTH_MIN_FREE_MB', 100))
+
+    # Observability
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_TOKEN_REQUIRED = False
+    # Include SQL time and statement counts in Server-Timing for everyone, not only admins
+    SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC', 'false').lower() == 'true'
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() == 'true'
+    PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', 40))
+
+    # Database engine tuning, see database.py. Unset values keep the driver defaults.
+    SQLITE_JOURNAL_MODE = None
+    SQLITE_BUSY_TIMEOUT_MS = None
+    SQLITE_SYNCHRONOUS = None
+    SQLITE_MMAP_SIZE = None
+    SQLITE_CACHE_SIZE = None
+    DB_POOL_SIZE = None
+    DB_MAX_OVERFLOW = None
+    DB_POOL_TIMEOUT = None
+    DB_POOL_RECYCLE = None
+    DB_POOL_PRE_PING = None
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
 
+    # /api/metrics answers 403 until a METRICS_TOKEN is configured
+    METRICS_TOKEN_REQUIRED = True
+
+    # SQLite: WAL lets readers run alongside the single writer, and
+    # busy_timeout makes writers wait instead of failing with "database is locked"
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+
+    # PostgreSQL / other server databases
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
@@ -0,0 +1,85 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+
+SQLITE_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SQLITE_SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+# config key -> create_engine() argument, for server databases
+POOL_OPTIONS = (
+    ('DB_POOL_SIZE', 'pool_size'),
+    ('DB_MAX_OVERFLOW', 'max_overflow'),
+    ('DB_POOL_TIMEOUT', 'pool_timeout'),
+    ('DB_POOL_RECYCLE', 'pool_recycle'),
+    ('DB_POOL_PRE_PING', 'pool_pre_ping'),
+)
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def build_engine_options(config):
+    """Translate the DB_* / SQLITE_* settings into SQLALCHEMY_ENGINE_OPTIONS"""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = config['SQLALCHEMY_DATABASE_URI']
+
+    if is_sqlite(uri):
+        busy_timeout = config.get('SQLITE_BUSY_TIMEOUT_MS')
+        if busy_timeout:
+            connect_args = dict(options.get('connect_args') or {})
+            connect_args.setdefault('timeout', busy_timeout / 1000)
+            options['connect_args'] = connect_args
+        return options
+
+    for key, option in POOL_OPTIONS:
+        if config.get(key) is not None:
+            options.setdefault(option, config[key])
+    return options
+
+def sqlite_pragmas(config):
+    pragmas = []
+
+    journal_mode = config.get('SQLITE_JOURNAL_MODE')
+    if journal_mode:
+        if journal_mode.upper() not in SQLITE_JOURNAL_MODES:
+            raise ValueError(f'Invalid SQLITE_JOURNAL_MODE: {journal_mode}')
+        pragmas.append(('journal_mode', journal_mode.upper()))
+
+    if config.get('SQLITE_BUSY_TIMEOUT_MS'):
+        pragmas.append(('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT_MS'])))
+
+    synchronous = config.get('SQLITE_SYNCHRONOUS')
+    if synchronous:
+        if synchronous.upper() not in SQLITE_SYNCHRONOUS_LEVELS:
+            raise ValueError(f'Invalid SQLITE_SYNCHRONOUS: {synchronous}')
+        pragmas.append(('synchronous', synchronous.upper()))
+
+    if config.get('SQLITE_MMAP_SIZE') is not None:
+        pragmas.append(('mmap_size', int(config['SQLITE_MMAP_SIZE'])))
+
+    if config.get('SQLITE_CACHE_SIZE') is not None:
+        pragmas.append(('cache_size', int(config['SQLITE_CACHE_SIZE'])))
+
+    return pragmas
+
+def init_sqlite_pragmas(app):
+    """Apply the configured PRAGMAs to every new SQLite connection"""
+    if not is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,128 @@
+"""Near-duplicate question detection with MinHash and LSH banding.
+
+Each active FAQ is reduced to the set of character 4-grams of its
+normalized question and tags. A MinHash signature of that set is split
+into bands; FAQs sharing any band bucket become candidates, and only those
+candidates get an exact Jaccard check. Lookups therefore touch a few
+buckets instead of the whole corpus. Rebuilds reuse the shingles and
+signature of every FAQ whose question and tags did not change.
+"""
+import random
+import zlib
+from faq_index import FAQIndex, register_index, tokenize
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS  # ~0.5 Jaccard detection threshold
+SHINGLE_SIZE = 4
+_PRIME = (1 << 61) - 1
+
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+
+def shingles(question, tags=''):
+    text = ' '.join(tokenize(question) + tokenize((tags or '').replace(',', ' ')))
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def band_keys(signature):
+    return [
+        (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        for band in range(BANDS)
+    ]
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class DuplicateIndex(FAQIndex):
+    """LSH buckets over MinHash signatures of active FAQs"""
+
+    name = 'duplicates'
+    fields = ('_buckets', '_docs')
+
+    def __init__(self):
+        super().__init__()
+        self._clear()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _clear(self):
+        self._buckets = {}
+        self._previous = {}
+        self._docs = {}
+
+    def _empty(self):
+        # Hashing is the expensive part of a rebuild; hand the current documents over
+        index = super()._empty()
+        with self._lock:
+            index._previous = dict(self._docs)
+        return index
+
+    def _add(self, faq):
+        previous = self._previous.pop(faq.id, None)
+        if previous and (previous['question'], previous['tags']) == (faq.question, faq.tags):
+            shingle_set, keys = previous['shingles'], previous['keys']
+        else:
+            shingle_set = shingles(faq.question, faq.tags)
+            if not shingle_set:
+                return
+            keys = band_keys(minhash(shingle_set))
+        self._docs[faq.id] = {
+            'question': faq.question,
+            'tags': faq.tags,
+            'category': faq.category,
+            'shingles': shingle_set,
+            'keys': keys,
+        }
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(faq.id)
+
+    def _remove(self, faq_id):
+        doc = self._docs.pop(faq_id, None)
+        if doc is None:
+            return
+        for key in doc['keys']:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(faq_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def find(self, question, tags='', exclude_id=None, threshold=0.6, limit=5):
+        """Return likely duplicates of a question, most similar first"""
+        shingle_set = shingles(question, tags)
+        if not shingle_set:
+            return []
+
+        with self._lock:
+            candidates = set()
+            for key in band_keys(minhash(shingle_set)):
+                candidates |= self._buckets.get(key, set())
+            candidates.discard(exclude_id)
+
+            matches = []
+            for faq_id in candidates:
+                doc = self._docs[faq_id]
+                similarity = jaccard(shingle_set, doc['shingles'])
+                if similarity >= threshold:
+                    matches.append({
+                        'id': faq_id,
+                        'question': doc['question'],
+                        'category': doc['category'],
+                        'similarity': round(similarity, 3),
+                    })
+
+        matches.sort(key=lambda m: (-m['similarity'], m['id']))
+        return matches[:limit]
+
+duplicate_index = register_index(DuplicateIndex())
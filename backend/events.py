@@ -0,0 +1,210 @@
+"""Server-sent change notifications.
+
+Write paths call ``publish`` inside their own transaction, which adds a
+row to the ``change_event`` table. Every worker process runs one poller
+thread that reads new rows and fans them out to in-memory subscriber
+queues, so all workers on the host see every change while a subscriber
+never holds a database connection. Clients that reconnect with
+``Last-Event-ID`` get the events they missed.
+
+Under WSGI each open stream occupies a thread; run gunicorn with the
+gthread (or a gevent) worker class when serving many subscribers, or serve
+the app through asgi.py, which streams events without a thread per client.
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, request
+from models import db, ChangeEvent
+
+def publish(kind, **payload):
+    """Record a change event; it is delivered once the caller commits"""
+    db.session.add(ChangeEvent(kind=kind, payload=json.dumps(payload)))
+    broker.start(current_app._get_current_object())
+
+def format_event(event_id, kind, payload):
+    return f'id: {event_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._last_id = None
+        self._last_prune = 0.0
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def queued_messages(self):
+        """Messages waiting in subscriber queues, summed over subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return sum(q.qsize() for q in subscribers)
+
+    def start(self, app):
+        """Start the poller thread of this process if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name='event-poller', daemon=True
+                )
+                self._thread.start()
+
+    def subscribe(self, app, q=None):
+        """Register a subscriber queue (a queue.Queue or a LoopQueue).
+
+        Needs an app context: when nobody was listening the poller stopped
+        reading events, so the first subscriber starts from the newest one.
+        """
+        if q is None:
+            q = queue.Queue(maxsize=app.config.get('EVENTS_QUEUE_SIZE', 100))
+        latest = None if self._subscribers else \
+            db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+        with self._lock:
+            if not self._subscribers and latest is not None:
+                self._last_id = latest
+            self._subscribers.add(q)
+        self.start(app)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def _fan_out(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow consumer: drop it, the client reconnects with Last-Event-ID
+                self.unsubscribe(q)
+                self._close(q)
+
+    @staticmethod
+    def _close(q):
+        """Wake a dropped subscriber without ever blocking the poller"""
+        if isinstance(q, LoopQueue):
+            return q.close()
+        # Its backlog is discarded anyway, so make room for the sentinel
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _poll(self):
+        if self._last_id is None:
+            self._last_id = db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+
+        rows = ChangeEvent.query.filter(ChangeEvent.id > self._last_id)\
+            .order_by(ChangeEvent.id.asc()).limit(500).all()
+        for row in rows:
+            self._fan_out((row.id, format_event(row.id, row.kind, row.payload)))
+            self._last_id = row.id
+
+    def _prune(self, app):
+        cutoff = datetime.utcnow() - timedelta(seconds=app.config.get('EVENTS_RETENTION_SECONDS', 3600))
+        ChangeEvent.query.filter(ChangeEvent.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+
+    def _run(self, app):
+        interval = app.config.get('EVENTS_POLL_INTERVAL', 1.0)
+        while True:
+            # Pruning runs whether or not anyone is listening; publishers
+            # start this thread too
+            prune = time.monotonic() - self._last_prune > 300
+            if self._subscribers or prune:
+                with app.app_context():
+                    try:
+                        if self._subscribers:
+                            self._poll()
+                        if prune:
+                            self._last_prune = time.monotonic()
+                            self._prune(app)
+                    except Exception:
+                        db.session.rollback()
+                        app.logger.exception('Event poller failed')
+                    finally:
+                        db.session.remove()
+            time.sleep(interval)
+
+broker = EventBroker()
+
+class LoopQueue:
+    """Subscriber queue for asyncio consumers (see asgi.py).
+
+    The poller thread hands messages to the event loop, so a waiting
+    client holds no thread.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.maxsize = maxsize
+        self.queue = asyncio.Queue()
+
+    def put_nowait(self, item):
+        if self.queue.qsize() >= self.maxsize:
+            raise queue.Full
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def close(self):
+        """Queue the end-of-stream sentinel, even when the queue is full"""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+def backlog(last_event_id):
+    """Events a reconnecting client missed"""
+    rows = ChangeEvent.query.filter(ChangeEvent.id > last_event_id)\
+        .order_by(ChangeEvent.id.asc()).limit(500).all()
+    messages = [(row.id, format_event(row.id, row.kind, row.payload)) for row in rows]
+    db.session.remove()
+    return messages
+
+def stream_events():
+    app = current_app._get_current_object()
+    heartbeat = app.config.get('EVENTS_HEARTBEAT_SECONDS', 15)
+    # Subscribe before reading the backlog so nothing falls in between;
+    # duplicates are skipped by event id below
+    q = broker.subscribe(app)
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    missed = backlog(last_event_id) if last_event_id is not None else []
+
+    def generate():
+        last_sent = last_event_id or 0
+        try:
+            yield f'retry: {app.config.get("EVENTS_RETRY_MS", 3000)}\n\n'
+            for event_id, message in missed:
+                last_sent = event_id
+                yield message
+            while True:
+                try:
+                    item = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if item is None:
+                    return
+                event_id, message = item
+                if event_id <= last_sent:
+                    continue
+                last_sent = event_id
+                yield message
+        finally:
+            broker.unsubscribe(q)
+
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,170 @@
+import re
+import threading
+import time
+from types import SimpleNamespace
+from sqlalchemy.orm import load_only
+from models import db, FAQ
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+def faq_terms(faq):
+    """Lower-cased tokens of a FAQ's question and tags"""
+    tokens = set(tokenize(faq.question))
+    for tag in (faq.tags or '').split(','):
+        tokens.update(tokenize(tag))
+    return tokens
+
+class FAQIndex:
+    """Base class for per-process in-memory indexes over active FAQs.
+
+    Subclasses implement ``_clear``, ``_add`` and ``_remove`` and list the
+    attributes holding their data in ``fields``. Local writes update the
+    index in place through ``faq_changed``/``faq_removed``; writes made by
+    other workers are picked up by a cheap count and max(updated_at) check
+    every ``refresh_interval`` seconds. Local writes leave the stored
+    signature alone: it cannot tell them apart from writes by other
+    workers, so the next check rebuilds once. Request handlers use
+    ``ensure_fresh_in_background`` so that rebuild never runs in a request.
+
+    A rebuild loads FAQs into a new, empty index without holding ``_lock``
+    and swaps its fields in at the end, so lookups keep using the current
+    index meanwhile. Local writes made during a rebuild are replayed on the
+    new index.
+    """
+
+    columns = (FAQ.id, FAQ.question, FAQ.category, FAQ.tags, FAQ.order)
+    fields = ()
+    name = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Held for a whole rebuild, separate from _lock so lookups don't wait
+        self._build_lock = threading.Lock()
+        self._built = False
+        self._pending = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, faq):
+        raise NotImplementedError
+
+    def _remove(self, faq_id):
+        raise NotImplementedError
+
+    def _empty(self):
+        """A new index of the same kind for a rebuild to fill"""
+        return type(self)()
+
+    def _apply(self, change):
+        self._remove(change.id)
+        if change.is_active:
+            self._add(change)
+
+    @staticmethod
+    def _current_signature():
+        return tuple(db.session.query(
+            db.func.count(FAQ.id), db.func.max(FAQ.updated_at)
+        ).one())
+
+    def _rebuild(self):
+        with self._lock:
+            self._pending = []
+        try:
+            # Signature first: a write landing in between triggers another rebuild
+            signature = self._current_signature()
+            faqs = FAQ.query.filter_by(is_active=True).options(load_only(*self.columns)).all()
+            index = self._empty()
+            for faq in faqs:
+                index._add(faq)
+            with self._lock:
+                for field in self.fields:
+                    setattr(self, field, getattr(index, field))
+                for change in self._pending:
+                    self._apply(change)
+                self._built = True
+                self._signature = signature
+                self._checked_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def rebuild(self):
+        with self._build_lock:
+            self._rebuild()
+
+    def _stale(self, refresh_interval):
+        """Whether the index needs a (re)build, checking at most once per interval"""
+        if not self._built:
+            return True
+        if time.monotonic() - self._checked_at < refresh_interval:
+            return False
+        self._checked_at = time.monotonic()
+        return self._current_signature() != self._signature
+
+    def ensure_fresh(self, refresh_interval):
+        """Build on first use and rebuild when another process changed FAQs"""
+        if self._stale(refresh_interval):
+            self.rebuild()
+
+    def ensure_fresh_in_background(self, app, refresh_interval):
+        """Like ensure_fresh, but builds and rebuilds run in a thread.
+
+        The current index keeps serving lookups during a rebuild. Returns
+        whether the index can be used now, i.e. has been built once.
+        """
+        if not self._stale(refresh_interval) or not self._build_lock.acquire(blocking=False):
+            return self._built
+
+        def build():
+            with app.app_context():
+                try:
+                    self._rebuild()
+                except Exception:
+                    app.logger.exception('Failed to build the %s index', self.name)
+                finally:
+                    self._build_lock.release()
+                    db.session.remove()
+
+        threading.Thread(target=build, name=f'{self.name}-index', daemon=True).start()
+        return self._built
+
+    def _record(self, change):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(change)
+            if self._built:
+                self._apply(change)
+
+    def upsert(self, faq):
+        # A plain copy: the change may be replayed after this request's session is gone
+        self._record(SimpleNamespace(
+            is_active=faq.is_active, **{column.key: getattr(faq, column.key) for column in self.columns}
+        ))
+
+    def remove(self, faq_id):
+        self._record(SimpleNamespace(id=faq_id, is_active=False))
+
+_indexes = []
+
+def register_index(index):
+    _indexes.append(index)
+    return index
+
+def faq_changed(faq):
+    """Reflect a created or updated FAQ in every in-memory index"""
+    for index in _indexes:
+        index.upsert(faq)
+
+def faq_removed(faq_id):
+    for index in _indexes:
+        index.remove(faq_id)
+
+def index_sizes():
+    """Indexed FAQs per registered index; None until an index is first built"""
+    return {index.name: len(index) if index._built else None for index in _indexes}
@@ -0,0 +1,77 @@
+"""Indexed full-text search over feedback text.
+
+SQLite uses an FTS5 table kept in sync with ``faq_feedback`` by triggers;
+PostgreSQL uses a GIN index on ``to_tsvector('simple', feedback_text)``.
+Other databases fall back to ILIKE.
+"""
+import re
+from models import db, FAQFeedback
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS faq_feedback_fts USING fts5(
+        feedback_text, content='faq_feedback', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS faq_feedback_fts_insert AFTER INSERT ON faq_feedback BEGIN
+        INSERT INTO faq_feedback_fts(rowid, feedback_text) VALUES (new.id, new.feedback_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS faq_feedback_fts_delete AFTER DELETE ON faq_feedback BEGIN
+        INSERT INTO faq_feedback_fts(faq_feedback_fts, rowid, feedback_text)
+        VALUES ('delete', old.id, old.feedback_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS faq_feedback_fts_update AFTER UPDATE OF feedback_text ON faq_feedback BEGIN
+        INSERT INTO faq_feedback_fts(faq_feedback_fts, rowid, feedback_text)
+        VALUES ('delete', old.id, old.feedback_text);
+        INSERT INTO faq_feedback_fts(rowid, feedback_text) VALUES (new.id, new.feedback_text);
+    END""",
+]
+
+POSTGRES_FTS_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_faq_feedback_text_fts ON faq_feedback
+        USING GIN (to_tsvector('simple', feedback_text))""",
+]
+
+def _dialect():
+    return db.engine.dialect.name
+
+def init_feedback_search():
+    """Create the full-text index (idempotent) and backfill it when new"""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        existed = db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'faq_feedback_fts'"
+        )).first() is not None
+        for statement in SQLITE_FTS_DDL:
+            db.session.execute(db.text(statement))
+        if not existed:
+            db.session.execute(db.text(
+                "INSERT INTO faq_feedback_fts(faq_feedback_fts) VALUES ('rebuild')"
+            ))
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_FTS_DDL:
+            db.session.execute(db.text(statement))
+    db.session.commit()
+
+def feedback_text_filter(text):
+    """SQL condition matching feedback whose text contains every word of ``text``"""
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return None
+
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        # Quote every word so user input can't form FTS5 syntax; the last
+        # word is matched as a prefix for search-as-you-type
+        match = ' '.join(f'"{w}"' for w in words[:-1])
+        match = f'{match} "{words[-1]}"*'.strip()
+        return FAQFeedback.id.in_(db.text(
+            'SELECT rowid FROM faq_feedback_fts WHERE faq_feedback_fts MATCH :match'
+        ).bindparams(match=match))
+
+    if dialect == 'postgresql':
+        return db.func.to_tsvector('simple', FAQFeedback.feedback_text).op('@@')(
+            db.func.plainto_tsquery('simple', ' '.join(words))
+        )
+
+    return db.and_(*[FAQFeedback.feedback_text.ilike(f'%{w}%') for w in words])
@@ -0,0 +1,130 @@
+from collections import Counter
+from faq_index import FAQIndex, register_index, faq_terms, tokenize
+
+def trigrams(term):
+    """Character trigrams of a term, padded like pg_trgm"""
+    padded = f'  {term} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, giving up once above max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def allowed_edits(term):
+    if len(term) <= 2:
+        return 0
+    if len(term) <= 5:
+        return 1
+    return 2
+
+class TrigramIndex(FAQIndex):
+    """Typo-tolerant term index over FAQ questions and tags.
+
+    Terms are indexed by their character trigrams, so candidates for a
+    misspelled query term come from the posting lists of its trigrams
+    instead of a scan over every FAQ. Candidates below the trigram
+    similarity threshold get a second chance through a bounded edit
+    distance, which catches transpositions in short product names such as
+    "lrp" for "lpr".
+    """
+
+    name = 'fuzzy'
+    fields = ('_term_trigrams', '_trigram_terms', '_term_docs', '_doc_terms')
+
+    def __init__(self):
+        super().__init__()
+        self._clear()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _clear(self):
+        self._term_trigrams = {}
+        self._trigram_terms = {}
+        self._term_docs = {}
+        self._doc_terms = {}
+
+    def _add(self, faq):
+        terms = {term for term in faq_terms(faq) if len(term) >= 2}
+        self._doc_terms[faq.id] = terms
+        for term in terms:
+            docs = self._term_docs.get(term)
+            if docs is None:
+                docs = self._term_docs[term] = set()
+                grams = self._term_trigrams[term] = trigrams(term)
+                for gram in grams:
+                    self._trigram_terms.setdefault(gram, set()).add(term)
+            docs.add(faq.id)
+
+    def _remove(self, faq_id):
+        for term in self._doc_terms.pop(faq_id, ()):
+            docs = self._term_docs.get(term)
+            if docs is None:
+                continue
+            docs.discard(faq_id)
+            if not docs:
+                del self._term_docs[term]
+                for gram in self._term_trigrams.pop(term):
+                    terms = self._trigram_terms.get(gram)
+                    terms.discard(term)
+                    if not terms:
+                        del self._trigram_terms[gram]
+
+    def similar_terms(self, token, threshold):
+        """Indexed terms similar to ``token`` as (term, similarity) pairs"""
+        grams = trigrams(token)
+        shared_counts = Counter()
+        for gram in grams:
+            shared_counts.update(self._trigram_terms.get(gram, ()))
+
+        max_edits = allowed_edits(token)
+        matches = []
+        for term, shared in shared_counts.items():
+            similarity = shared / (len(grams) + len(self._term_trigrams[term]) - shared)
+            if similarity < threshold:
+                if not max_edits:
+                    continue
+                distance = edit_distance(token, term, max_edits)
+                if distance > max_edits:
+                    continue
+                similarity = 1 - distance / max(len(token), len(term))
+            matches.append((term, similarity))
+        return matches
+
+    def search(self, query, threshold=0.3, limit=200):
+        """Return [(faq_id, score)] best first, score in 0..1"""
+        tokens = [token for token in tokenize(query) if len(token) >= 2]
+        if not tokens:
+            return []
+
+        scores = Counter()
+        with self._lock:
+            for token in tokens:
+                best = {}
+                for term, similarity in self.similar_terms(token, threshold):
+                    for faq_id in self._term_docs[term]:
+                        if similarity > best.get(faq_id, 0):
+                            best[faq_id] = similarity
+                for faq_id, similarity in best.items():
+                    scores[faq_id] += similarity / len(tokens)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(faq_id, round(score, 3)) for faq_id, score in ranked[:limit]]
+
+fuzzy_index = register_index(TrigramIndex())
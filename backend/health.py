@@ -0,0 +1,143 @@
+"""Liveness and readiness probes.
+
+``/api/health/live`` only shows that the process answers requests.
+``/api/health/ready`` also checks that the database answers within
+``HEALTH_DB_TIMEOUT`` seconds and that the upload directory is writable
+with enough free space; the result is cached for ``HEALTH_CACHE_SECONDS``
+so frequent load-balancer probes add no load. Both report per-process
+resource usage for capacity planning.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from models import db, User
+from cache import response_cache
+from events import broker
+from related import related_refresher
+from faq_index import index_sizes
+from search_analytics import search_analytics
+
+UPLOAD_ROOT = 'uploads'
+
+def rss_bytes():
+    """Current resident set size; peak RSS where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource  # not available on Windows
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+def pool_stats():
+    pool = db.engine.pool
+    stats = {'class': type(pool).__name__}
+    for name in ('size', 'checkedout', 'checkedin', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    if 'overflow' in stats:
+        # QueuePool counts overflow from -size; report connections beyond the pool
+        stats['overflow'] = max(stats['overflow'], 0)
+    return stats
+
+def resource_stats(app):
+    return {
+        'pid': os.getpid(),
+        'rss_bytes': rss_bytes(),
+        'threads': threading.active_count(),
+        'db_pool': pool_stats(),
+        'caches': {
+            'response_cache': {
+                'entries': len(response_cache),
+                'max_entries': app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 256)
+            },
+            'indexes': index_sizes(),
+        },
+        'queues': {
+            'event_subscribers': broker.subscriber_count(),
+            'event_messages': broker.queued_messages(),
+            'search_analytics_pending': search_analytics.pending(),
+            'related_refresh_pending': related_refresher.pending(),
+        },
+    }
+
+class ReadinessProbe:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # One probe thread: a wedged query blocks it instead of piling up threads
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='health-probe')
+        self._pending = None
+        self._result = None
+        self._expires_at = 0.0
+
+    def _query_database(self, app):
+        with app.app_context():
+            try:
+                # Touches a real table, so a locked SQLite file is noticed
+                db.session.query(User.id).limit(1).all()
+            finally:
+                db.session.remove()
+
+    def check_database(self, app):
+        timeout = app.config.get('HEALTH_DB_TIMEOUT', 1.0)
+        started = time.perf_counter()
+        if self._pending is None or self._pending.done():
+            self._pending = self._executor.submit(self._query_database, app)
+        try:
+            self._pending.result(timeout=timeout)
+        except FutureTimeout:
+            return {'ok': False, 'error': f'no answer within {timeout}s'}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+    def check_uploads(self, app):
+        min_free = app.config.get('HEALTH_MIN_FREE_MB', 100) * 1024 * 1024
+        try:
+            os.makedirs(UPLOAD_ROOT, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=UPLOAD_ROOT, prefix='.health-') as f:
+                f.write(b'ok')
+                f.flush()
+            free = shutil.disk_usage(UPLOAD_ROOT).free
+        except OSError as e:
+            return {'ok': False, 'error': str(e)}
+        if free < min_free:
+            return {'ok': False, 'free_bytes': free, 'error': 'low disk space'}
+        return {'ok': True, 'free_bytes': free}
+
+    def result(self, app):
+        with self._lock:
+            now = time.monotonic()
+            if self._result is not None and now < self._expires_at:
+                return self._result, True
+            checks = {'database': self.check_database(app), 'uploads': self.check_uploads(app)}
+            self._result = {
+                'status': 'ready' if all(check['ok'] for check in checks.values()) else 'not_ready',
+                'checks': checks,
+                'checked_at': time.time(),
+            }
+            self._expires_at = now + app.config.get('HEALTH_CACHE_SECONDS', 2.0)
+            return self._result, False
+
+readiness_probe = ReadinessProbe()
+
+def init_health(app):
+    """Register /api/health/live and /api/health/ready"""
+
+    @app.route('/api/health/live', methods=['GET'])
+    def liveness():
+        return {'status': 'alive', 'resources': resource_stats(app)}
+
+    @app.route('/api/health/ready', methods=['GET'])
+    def readiness():
+        result, cached = readiness_probe.result(app)
+        body = dict(result, cached=cached, resources=resource_stats(app))
+        return body, 200 if result['status'] == 'ready' else 503
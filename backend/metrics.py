@@ -0,0 +1,207 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from flask import current_app, g, request, has_app_context, has_request_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db, User
+from compression import compression_stats
+
+logger = logging.getLogger('faq.metrics')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class MetricsRegistry:
+    """Per-process request and SQL metrics rendered in Prometheus text format.
+
+    Each worker process keeps its own registry; scrape every worker (or sum
+    them) when running under gunicorn with several workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.request_latency = {}
+            self.request_count = {}
+            self.sql_per_request = {}
+            self.sql_seconds = {}
+            self.slow_queries = 0
+
+    def observe_request(self, endpoint, method, status, seconds, sql_count, sql_seconds):
+        with self._lock:
+            key = (endpoint, method)
+            self.request_latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            count_key = (endpoint, method, str(status))
+            self.request_count[count_key] = self.request_count.get(count_key, 0) + 1
+            self.sql_per_request.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(sql_count)
+            self.sql_seconds[key] = self.sql_seconds.get(key, 0.0) + sql_seconds
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP faq_http_requests_total Total HTTP requests.')
+            lines.append('# TYPE faq_http_requests_total counter')
+            for (endpoint, method, status), value in sorted(self.request_count.items()):
+                labels = _labels(endpoint=endpoint, method=method, status=status)
+                lines.append(f'faq_http_requests_total{labels} {value}')
+
+            _render_histogram(lines, 'faq_http_request_duration_seconds',
+                              'Request latency in seconds.', self.request_latency)
+            _render_histogram(lines, 'faq_sql_statements_per_request',
+                              'SQL statements executed per request.', self.sql_per_request)
+
+            lines.append('# HELP faq_sql_duration_seconds_total Time spent in SQL statements.')
+            lines.append('# TYPE faq_sql_duration_seconds_total counter')
+            for (endpoint, method), value in sorted(self.sql_seconds.items()):
+                labels = _labels(endpoint=endpoint, method=method)
+                lines.append(f'faq_sql_duration_seconds_total{labels} {value:.6f}')
+
+            lines.append('# HELP faq_sql_slow_statements_total SQL statements above the slow query threshold.')
+            lines.append('# TYPE faq_sql_slow_statements_total counter')
+            lines.append(f'faq_sql_slow_statements_total {self.slow_queries}')
+
+        compression = compression_stats()
+        for name, key, help_text in (
+            ('faq_compression_responses_total', 'responses', 'Responses compressed.'),
+            ('faq_compression_bytes_in_total', 'bytes_in', 'Bytes before compression.'),
+            ('faq_compression_bytes_out_total', 'bytes_out', 'Bytes after compression.'),
+            ('faq_compression_seconds_total', 'seconds', 'Time spent compressing.'),
+            ('faq_compression_ratio', 'ratio', 'Compressed size / original size.'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {"gauge" if key == "ratio" else "counter"}')
+            for encoding, stats in sorted(compression.items()):
+                lines.append(f'{name}{_labels(encoding=encoding)} {stats[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+def _render_histogram(lines, name, help_text, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), hist in sorted(histograms.items()):
+        for bound, count in zip(hist.buckets, hist.counts):
+            labels = _labels(endpoint=endpoint, method=method, le=bound)
+            lines.append(f'{name}_bucket{labels} {count}')
+        labels = _labels(endpoint=endpoint, method=method, le='+Inf')
+        lines.append(f'{name}_bucket{labels} {hist.count}')
+        labels = _labels(endpoint=endpoint, method=method)
+        lines.append(f'{name}_sum{labels} {hist.sum:.6f}')
+        lines.append(f'{name}_count{labels} {hist.count}')
+
+registry = MetricsRegistry()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+
+    if has_request_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_seconds += elapsed
+
+    if has_app_context():
+        threshold_ms = current_app.config.get('SLOW_QUERY_THRESHOLD_MS', 200)
+        if threshold_ms and elapsed * 1000 >= threshold_ms:
+            registry.record_slow_query()
+            logger.warning('Slow query (%.1f ms): %s', elapsed * 1000, statement)
+
+def _current_user_is_admin():
+    """Whether the request carries an admin's token; looked up once per request"""
+    if 'is_admin' not in g:
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+            user = db.session.get(User, int(user_id)) if user_id else None
+            g.is_admin = bool(user and user.is_admin)
+        except Exception:
+            g.is_admin = False
+    return g.is_admin
+
+def _profile_response(profiler):
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats('cumulative').print_stats(current_app.config.get('PROFILE_TOP_N', 40))
+    return current_app.response_class(output.getvalue(), mimetype='text/plain')
+
+def init_metrics(app):
+    """Record per-endpoint latency and SQL usage and expose /api/metrics"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        g.profiler = None
+
+        # Opt-in profiling: ?_profile=1 for admins only
+        if request.args.get('_profile') and app.config.get('PROFILING_ENABLED', True):
+            if _current_user_is_admin():
+                g.profiler = cProfile.Profile()
+                g.profiler.enable()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_start_time' not in g:
+            return response
+
+        if g.profiler is not None:
+            g.profiler.disable()
+            response = _profile_response(g.profiler)
+
+        elapsed = time.perf_counter() - g.request_start_time
+        endpoint = request.url_rule.rule if request.url_rule else '<unmatched>'
+        registry.observe_request(endpoint, request.method, response.status_code,
+                                 elapsed, g.sql_count, g.sql_seconds)
+
+        # SQL time and statement counts reveal how a request is served; only
+        # admins see them unless SERVER_TIMING_PUBLIC is set (benchmarks)
+        server_timing = f'app;dur={elapsed * 1000:.1f}'
+        if app.config.get('SERVER_TIMING_PUBLIC') or (
+                'Authorization' in request.headers and _current_user_is_admin()):
+            server_timing += f', db;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_count} queries"'
+        response.headers['Server-Timing'] = server_timing
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if not token and app.config.get('METRICS_TOKEN_REQUIRED'):
+            return {'error': 'Metrics are disabled until METRICS_TOKEN is set'}, 403
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return {'error': 'Unauthorized'}, 401
+        return app.response_class(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import bcrypt
+import json
 
 db = SQLAlchemy()
 
@@ -20,9 +21,16 @@ class User(db.Model):
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash)
 
 class FAQ(db.Model):
+    __table_args__ = (
+        db.Index('ix_faq_category_active', 'category', 'is_active'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     question = db.Column(db.Text, nullable=False)
     answer = db.Column(db.Text, nullable=False)
+    # Pre-rendered answer, see rendering.py
+    answer_html = db.Column(db.Text)
+    answer_toc = db.Column(db.Text)
     category = db.Column(db.String(50), nullable=False)
     tags = db.Column(db.String(200))
     is_active = db.Column(db.Boolean, default=True)
@@ -33,25 +41,32 @@ class FAQ(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
     attachments = db.relationship('Attachment', backref='faq', lazy='dynamic', cascade='all, delete-orphan')
 
-    def to_dict(self):
-        # Calculate rating statistics
-        ratings = [r.rating for r in self.ratings]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
-        rating_dist = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        for r in ratings:
-            rating_dist[r] += 1
+    def to_dict(self, fields=None, rating_stats=None):
+        """Serialize the FAQ.
 
-        return {
-            'id': self.id,
-            'question': self.question,
-            'answer': self.answer,
-            'category': self.category,
-            'tags': self.tags.split(',') if self.tags else [],
-            'is_active': self.is_active,
-            'order': self.order,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'attachments': [
+        ``fields`` limits the output to a subset of ``FAQ_FIELDS``; relations
+        that are not requested are never loaded. ``rating_stats`` may be passed
+        in when it was already computed in bulk (see ``rating_stats_for``).
+        """
+        if fields is None:
+            fields = FAQ_DEFAULT_FIELDS
+
+        data = {}
+        for name in FAQ_COLUMN_FIELDS:
+            if name in fields:
+                data[name] = getattr(self, name)
+
+        if 'answer_toc' in data:
+            data['answer_toc'] = json.loads(self.answer_toc) if self.answer_toc else []
+        if 'tags' in data:
+            data['tags'] = self.tags.split(',') if self.tags else []
+        if 'created_at' in data:
+            data['created_at'] = self.created_at.isoformat()
+        if 'updated_at' in data:
+            data['updated_at'] = self.updated_at.isoformat()
+
+        if 'attachments' in fields:
+            data['attachments'] = [
                 {
                     'id': att.id,
                     'url': f'/api/uploads/{att.filename}',
@@ -62,13 +77,89 @@ class FAQ(db.Model):
                     'mime_type': att.mime_type
                 }
                 for att in self.attachments or []
-            ],
-            'rating_stats': {
-                'average_rating': round(avg_rating, 1),
-                'total_ratings': len(ratings),
-                'rating_distribution': rating_dist
-            }
+            ]
+
+        if 'rating_stats' in fields:
+            if rating_stats is None:
+                rating_stats = summarize_ratings(r.rating for r in self.ratings)
+            data['rating_stats'] = rating_stats
+
+        return data
+
+# Fields that can be requested from FAQ.to_dict / GET /api/faqs?fields=
+FAQ_COLUMN_FIELDS = ('id', 'question', 'answer', 'answer_html', 'answer_toc', 'category',
+                     'tags', 'is_active', 'order', 'created_at', 'updated_at')
+FAQ_RELATION_FIELDS = ('attachments', 'rating_stats')
+FAQ_FIELDS = FAQ_COLUMN_FIELDS + FAQ_RELATION_FIELDS
+
+# Returned when no fields are requested; ?format=html swaps the markdown
+# answer for the pre-rendered one
+FAQ_DEFAULT_FIELDS = tuple(f for f in FAQ_FIELDS if f not in ('answer_html', 'answer_toc'))
+FAQ_HTML_FIELDS = tuple(f for f in FAQ_FIELDS if f != 'answer')
+
+# What the public list views render before a row is expanded
+FAQ_SUMMARY_FIELDS = ('id', 'question', 'category', 'tags', 'order', 'rating_stats')
+
+def _stats_from_distribution(rating_dist):
+    total = sum(rating_dist.values())
+    avg_rating = sum(r * n for r, n in rating_dist.items()) / total if total else 0
+    return {
+        'average_rating': round(avg_rating, 1),
+        'total_ratings': total,
+        'rating_distribution': rating_dist
+    }
+
+def summarize_ratings(ratings):
+    """Build the rating_stats payload from an iterable of 1-5 ratings"""
+    rating_dist = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+    for r in ratings:
+        rating_dist[r] += 1
+    return _stats_from_distribution(rating_dist)
+
+def rating_stats_for(faq_ids):
+    """Compute rating_stats for many FAQs with a single grouped query"""
+    faq_ids = list(faq_ids)
+    dists = {faq_id: {1: 0, 2: 0, 3: 0, 4: 0, 5: 0} for faq_id in faq_ids}
+    if not faq_ids:
+        return {}
+
+    rows = db.session.query(
+        FAQRating.faq_id, FAQRating.rating, db.func.count(FAQRating.id)
+    ).filter(
+        FAQRating.faq_id.in_(faq_ids)
+    ).group_by(FAQRating.faq_id, FAQRating.rating).all()
+
+    for faq_id, rating, count in rows:
+        dists[faq_id][rating] = count
+
+    return {faq_id: _stats_from_distribution(dist) for faq_id, dist in dists.items()}
+
+def category_stats(names=None):
+    """Active FAQ count, average rating and last update per category name.
+
+    One grouped query over active FAQs and their ratings; categories
+    without active FAQs are missing from the result.
+    """
+    query = db.session.query(
+        FAQ.category,
+        db.func.count(db.distinct(FAQ.id)),
+        db.func.avg(FAQRating.rating),
+        db.func.count(FAQRating.id),
+        db.func.max(FAQ.updated_at)
+    ).outerjoin(FAQRating, FAQRating.faq_id == FAQ.id).filter(FAQ.is_active == True)
+
+    if names is not None:
+        query = query.filter(FAQ.category.in_(list(names)))
+
+    return {
+        name: {
+            'faq_count': faq_count,
+            'average_rating': round(avg_rating, 1) if avg_rating is not None else 0,
+            'total_ratings': total_ratings,
+            'last_updated': last_updated.isoformat() if last_updated else None
         }
+        for name, faq_count, avg_rating, total_ratings, last_updated in query.group_by(FAQ.category)
+    }
 
 class Attachment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -78,7 +169,7 @@ class Attachment(db.Model):
     file_size = db.Column(db.Integer)
     mime_type = db.Column(db.String(100))
     file_type = db.Column(db.String(20))  # 'image', 'document', 'other'
-    faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'))
+    faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Category(db.Model):
@@ -90,8 +181,8 @@ class Category(db.Model):
     order = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
 
-    def to_dict(self):
-        return {
+    def to_dict(self, stats=None):
+        data = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
@@ -100,10 +191,14 @@ class Category(db.Model):
             'order': self.order,
             'is_active': self.is_active
         }
+        if stats is not None:
+            # Entry of category_stats(); empty for a category without active FAQs
+            data.update(stats or {'faq_count': 0, 'average_rating': 0, 'total_ratings': 0, 'last_updated': None})
+        return data
 
 class FAQRating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'), nullable=False)
+    faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'), nullable=False, index=True)
     rating = db.Column(db.Integer, nullable=False)  # 1-5
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     ip_address = db.Column(db.String(45), nullable=False)
@@ -124,6 +219,13 @@ class FAQRating(db.Model):
         }
 
 class FAQFeedback(db.Model):
+    __table_args__ = (
+        # Keyset pagination of the admin inbox, optionally by helpfulness or FAQ
+        db.Index('ix_faq_feedback_created_id', 'created_at', 'id'),
+        db.Index('ix_faq_feedback_helpful_created_id', 'is_helpful', 'created_at', 'id'),
+        db.Index('ix_faq_feedback_faq_created', 'faq_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'), nullable=False)
     rating_id = db.Column(db.Integer, db.ForeignKey('faq_rating.id'), nullable=True)
@@ -150,4 +252,82 @@ class FAQFeedback(db.Model):
             'ip_address': self.ip_address,
             'is_helpful': self.is_helpful,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class FAQRelated(db.Model):
+    """Precomputed nearest neighbours of a FAQ, see related.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'), nullable=False, index=True)
+    related_faq_id = db.Column(db.Integer, db.ForeignKey('faq.id'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.Integer, nullable=False)
+
+class ChangeEvent(db.Model):
+    """Change notifications fanned out over /api/events, see events.py"""
+    __tablename__ = 'change_event'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class SearchStat(db.Model):
+    """Daily search aggregates flushed from memory, see search_analytics.py"""
+    __tablename__ = 'search_stat'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'kind', 'term', name='uq_search_stat_day_kind_term'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # query, zero_result, filters, total
+    term = db.Column(db.String(200), nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    zero_results = db.Column(db.Integer, default=0, nullable=False)
+    total_results = db.Column(db.Integer, default=0, nullable=False)
+    total_latency_ms = db.Column(db.Float, default=0.0, nullable=False)
+
+class UploadSession(db.Model):
+    """An in-progress chunked upload, see routes/upload.py"""
+    __tablename__ = 'upload_session'
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    # Bytes acknowledged so far; the next chunk must start here
+    received = db.Column(db.BigInteger, default=0, nullable=False)
+    # Hex SHA-256 of every acknowledged chunk, concatenated
+    chunk_hashes = db.Column(db.Text, default='', nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'upload_id': self.id,
+            'filename': self.original_filename,
+            'size': self.total_size,
+            'chunk_size': self.chunk_size,
+            'offset': self.received,
+            'complete': self.received == self.total_size
+        }
+
+def _archive_table(model):
+    """A copy of the model's columns without constraints, plus archived_at.
+
+    Ids are reused once rows leave the hot tables, so the same id can be
+    archived more than once: archive rows get their own ``archive_id`` and
+    keep the hot table's id as the non-unique ``original_id``.
+    """
+    columns = [
+        db.Column('original_id', column.type, nullable=False, index=True) if column.primary_key
+        else db.Column(column.name, column.type, nullable=column.nullable)
+        for column in model.__table__.columns
+    ]
+    return db.Table(f'archive_{model.__table__.name}',
+                    db.Column('archive_id', db.Integer, primary_key=True), *columns,
+                    db.Column('archived_at', db.DateTime, nullable=False, index=True))
+
+# Archived soft-deleted FAQs and their dependents, see archive.py. Ordered
+# children first, the order rows leave the hot tables.
+ARCHIVE_TABLES = [
+    (model, _archive_table(model)) for model in (Attachment, FAQFeedback, FAQRating, FAQ)
+]
@@ -0,0 +1,206 @@
+"""Related-FAQ recommendations from TF-IDF cosine similarity.
+
+Vectors are sparse dicts built from the question, answer and tags of every
+active FAQ. The top-k neighbours of each FAQ are stored in the
+``faq_related`` table so the detail page only reads a handful of rows.
+``flask compute-related`` rebuilds the whole table. FAQ writes only queue
+the changed id on ``related_refresher``; its thread runs ``refresh_related``
+for everything queued once writes have been quiet for a moment, so no
+request ever waits for the model to be rebuilt.
+"""
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from flask import current_app
+from models import db, FAQ, FAQRelated
+from faq_index import tokenize
+
+# Questions and tags describe a FAQ better than long answers do
+FIELD_WEIGHTS = (('question', 2.0), ('tags', 2.0), ('answer', 1.0))
+# Below this many FAQs no term is too common to keep
+MAX_DF_MIN_DOCUMENTS = 20
+
+def _term_frequencies(faq):
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        text = getattr(faq, field) or ''
+        if field == 'tags':
+            text = text.replace(',', ' ')
+        for token in tokenize(text):
+            if len(token) >= 2 and not token.isdigit():
+                counts[token] += weight
+    return counts
+
+class TfidfModel:
+    """TF-IDF vectors plus an inverted index for sparse dot products"""
+
+    def __init__(self, faqs, max_df=0.5):
+        frequencies = {faq.id: _term_frequencies(faq) for faq in faqs}
+
+        document_frequency = Counter()
+        for counts in frequencies.values():
+            document_frequency.update(counts.keys())
+
+        total = len(frequencies)
+        # Terms in most FAQs act as stopwords (in any language): they make
+        # nearly every pair of FAQs similar, so they are left out
+        limit = max_df * total if total >= MAX_DF_MIN_DOCUMENTS else total
+        idf = {
+            term: math.log((1 + total) / (1 + df)) + 1
+            for term, df in document_frequency.items() if df <= limit
+        }
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for faq_id, counts in frequencies.items():
+            vector = {term: (1 + math.log(tf)) * idf[term] for term, tf in counts.items() if term in idf}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            vector = {term: w / norm for term, w in vector.items()}
+            self.vectors[faq_id] = vector
+            for term, weight in vector.items():
+                self.postings[term].append((faq_id, weight))
+
+    def similarities(self, faq_id):
+        """Cosine similarity of ``faq_id`` to every FAQ sharing a term with it"""
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(faq_id, {}).items():
+            for other_id, other_weight in self.postings[term]:
+                if other_id != faq_id:
+                    scores[other_id] += weight * other_weight
+        return scores
+
+    def neighbours(self, faq_id, k):
+        scores = self.similarities(faq_id)
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+def load_model():
+    faqs = FAQ.query.filter_by(is_active=True).with_entities(
+        FAQ.id, FAQ.question, FAQ.answer, FAQ.tags
+    ).all()
+    return TfidfModel(faqs, current_app.config.get('RELATED_FAQS_MAX_DF', 0.5))
+
+def _neighbour_rows(faq_id, neighbours, min_score):
+    return [
+        {'faq_id': faq_id, 'related_faq_id': related_id, 'score': round(score, 4), 'rank': rank}
+        for rank, (related_id, score) in enumerate(n for n in neighbours if n[1] >= min_score)
+    ]
+
+def _replace_neighbours(faq_ids, rows):
+    faq_ids = list(faq_ids)
+    if faq_ids:
+        FAQRelated.query.filter(FAQRelated.faq_id.in_(faq_ids)).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(FAQRelated.__table__.insert(), rows)
+
+def compute_all_related():
+    """Recompute the neighbour lists of every active FAQ"""
+    k = current_app.config.get('RELATED_FAQS_K', 10)
+    min_score = current_app.config.get('RELATED_FAQS_MIN_SCORE', 0.05)
+
+    model = load_model()
+    rows = []
+    for faq_id in model.vectors:
+        rows.extend(_neighbour_rows(faq_id, model.neighbours(faq_id, k), min_score))
+
+    FAQRelated.query.delete(synchronize_session=False)
+    _replace_neighbours((), rows)
+    db.session.commit()
+    return len(model.vectors)
+
+def refresh_related(faq_ids):
+    """Update stored neighbours after some FAQs changed.
+
+    Recomputes the changed FAQs' own lists and only those lists that either
+    point at one of them or would now rank it above their current last
+    entry. IDF weights drift slowly as the corpus grows; run ``flask
+    compute-related`` periodically to re-weight everything. An empty table
+    (``compute-related`` never ran) only gets the changed FAQs' lists.
+    """
+    k = current_app.config.get('RELATED_FAQS_K', 10)
+    min_score = current_app.config.get('RELATED_FAQS_MIN_SCORE', 0.05)
+    faq_ids = set(faq_ids)
+
+    model = load_model()
+    affected = set(faq_ids)
+    affected.update(row.faq_id for row in FAQRelated.query.filter(FAQRelated.related_faq_id.in_(faq_ids)))
+    populated = db.session.query(FAQRelated.id).first() is not None
+
+    for faq_id in faq_ids:
+        if not populated or faq_id not in model.vectors:
+            continue
+        scores = model.similarities(faq_id)
+
+        # Lists that may now include the changed FAQ
+        candidates = [other_id for other_id, score in scores.items()
+                      if score >= min_score and other_id not in affected]
+        if candidates:
+            current = {
+                other_id: (count, lowest)
+                for other_id, count, lowest in db.session.query(
+                    FAQRelated.faq_id, db.func.count(FAQRelated.id), db.func.min(FAQRelated.score)
+                ).filter(FAQRelated.faq_id.in_(candidates)).group_by(FAQRelated.faq_id)
+            }
+            for other_id in candidates:
+                count, lowest = current.get(other_id, (0, 0))
+                if count < k or scores[other_id] > lowest:
+                    affected.add(other_id)
+
+    rows = []
+    for other_id in affected:
+        if other_id in model.vectors:
+            rows.extend(_neighbour_rows(other_id, model.neighbours(other_id, k), min_score))
+
+    _replace_neighbours(affected, rows)
+    db.session.commit()
+    return len(affected)
+
+class RelatedRefresher:
+    """Per-process background thread for ``refresh_related``.
+
+    ``schedule`` only records the id. The thread waits until no id was
+    queued for ``RELATED_REFRESH_DELAY`` seconds, so a burst of edits costs
+    one model build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = set()
+        self._thread = None
+        self._app = None
+
+    def pending(self):
+        return len(self._pending)
+
+    def schedule(self, app, faq_id):
+        with self._lock:
+            self._app = app
+            self._pending.add(faq_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='related-refresh', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            delay = self._app.config.get('RELATED_REFRESH_DELAY', 5)
+            while True:
+                self._wakeup.clear()
+                if not self._wakeup.wait(delay):
+                    break
+            with self._lock:
+                faq_ids, self._pending = self._pending, set()
+            if not faq_ids:
+                continue
+            with self._app.app_context():
+                try:
+                    refresh_related(faq_ids)
+                except Exception:
+                    db.session.rollback()
+                    self._app.logger.exception('Failed to refresh related FAQs for %s', sorted(faq_ids))
+                finally:
+                    db.session.remove()
+
+related_refresher = RelatedRefresher()
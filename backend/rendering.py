@@ -0,0 +1,63 @@
+"""Server-side markdown rendering for FAQ answers.
+
+Answers are rendered once when they are written and stored in
+``FAQ.answer_html`` / ``FAQ.answer_toc``, so clients on slow devices don't
+have to parse and highlight markdown themselves.
+"""
+import json
+
+ALLOWED_TAGS = [
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'span', 'strong',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul', 'del',
+]
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'img': ['src', 'alt', 'title'],
+    'div': ['class'],
+    'span': ['class'],
+    'code': ['class'],
+    'pre': ['class'],
+    'td': ['align'],
+    'th': ['align'],
+    **{f'h{level}': ['id'] for level in range(1, 7)},
+}
+ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+
+def _flatten_toc(tokens):
+    entries = []
+    for token in tokens:
+        entries.append({'level': token['level'], 'id': token['id'], 'name': token['name']})
+        entries.extend(_flatten_toc(token['children']))
+    return entries
+
+def render_markdown(text):
+    """Render markdown to sanitized HTML with highlighted code blocks.
+
+    Returns ``(html, toc)`` where toc is a flat list of headings.
+    """
+    # Imported here so that app startup does not pay for markdown/pygments
+    import bleach
+    import markdown
+
+    md = markdown.Markdown(
+        extensions=['fenced_code', 'codehilite', 'tables', 'toc', 'sane_lists'],
+        extension_configs={
+            'codehilite': {'css_class': 'highlight', 'guess_lang': False},
+        }
+    )
+    html = md.convert(text or '')
+    html = bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+        strip=True
+    )
+    return html, _flatten_toc(md.toc_tokens)
+
+def render_faq_answer(faq):
+    """Store the rendered answer on the FAQ (caller commits)"""
+    html, toc = render_markdown(faq.answer)
+    faq.answer_html = html
+    faq.answer_toc = json.dumps(toc)
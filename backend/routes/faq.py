@@ -1,11 +1,48 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import FAQ, Category, User, FAQRating, FAQFeedback, Attachment, db
+from sqlalchemy.orm import load_only
+from models import (
+    FAQ, Category, User, FAQRating, FAQFeedback, Attachment, FAQRelated, db,
+    FAQ_FIELDS, FAQ_COLUMN_FIELDS, FAQ_SUMMARY_FIELDS, FAQ_HTML_FIELDS, rating_stats_for, category_stats
+)
+from cache import cached_response, response_cache, tag_response
+from search_analytics import tracked_search, search_summary
+from suggest import suggest_index
+from fuzzy import fuzzy_index
+from faq_index import faq_changed, faq_removed
+from related import related_refresher
+from duplicates import duplicate_index
+from events import publish
+from rendering import render_faq_answer
 from datetime import datetime
 
 faq_bp = Blueprint('faq', __name__)
 
+def parse_fields(args):
+    """Resolve ?fields= / ?view= / ?format= into the set of FAQ fields to return.
+
+    Returns None for the full representation.
+    """
+    fields = args.get('fields')
+    if fields:
+        requested = {f.strip() for f in fields.split(',') if f.strip() in FAQ_FIELDS}
+        requested.add('id')
+    elif args.get('view') == 'summary':
+        requested = set(FAQ_SUMMARY_FIELDS)
+    elif args.get('format') == 'html':
+        return set(FAQ_HTML_FIELDS)
+    else:
+        return None
+
+    # format=html swaps the markdown answer for the pre-rendered one
+    if args.get('format') == 'html' and 'answer' in requested:
+        requested.discard('answer')
+        requested.update(('answer_html', 'answer_toc'))
+    return requested
+
 @faq_bp.route('/faqs', methods=['GET'])
+@tracked_search
+@cached_response
 def get_faqs():
     try:
         # Get query parameters
@@ -21,85 +58,102 @@ def get_faqs():
         sort_order = request.args.get('sort_order', 'asc')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(request.args)
+
+        def build_query(fuzzy_ranks=None):
+            # Start query
+            query = FAQ.query.filter_by(is_active=True)
+
+            # Only select the requested columns (e.g. defer the answer text)
+            if fields is not None:
+                query = query.options(load_only(
+                    *[getattr(FAQ, name) for name in FAQ_COLUMN_FIELDS if name in fields]
+                ))
+
+            # Apply filters
+            if category and category != 'all':
+                query = query.filter_by(category=category)
+
+            if fuzzy_ranks is not None:
+                query = query.filter(FAQ.id.in_(list(fuzzy_ranks)))
+            elif search:
+                query = query.filter(
+                    db.or_(
+                        FAQ.question.ilike(f'%{search}%'),
+                        FAQ.answer.ilike(f'%{search}%'),
+                        FAQ.tags.ilike(f'%{search}%')
+                    )
+                )
 
-        # Start query
-        query = FAQ.query.filter_by(is_active=True)
-
-        # Apply filters
-        if category and category != 'all':
-            query = query.filter_by(category=category)
-
-        if search:
-            query = query.filter(
-                db.or_(
-                    FAQ.question.ilike(f'%{search}%'),
-                    FAQ.answer.ilike(f'%{search}%'),
-                    FAQ.tags.ilike(f'%{search}%')
+            if tags:
+                for tag in tags:
+                    if tag.strip():
+                        query = query.filter(FAQ.tags.ilike(f'%{tag.strip()}%'))
+
+            if date_from:
+                try:
+                    date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
+                    query = query.filter(FAQ.created_at >= date_from_obj)
+                except ValueError:
+                    pass
+
+            if date_to:
+                try:
+                    date_to_obj = datetime.strptime(date_to, '%Y-%m-%d')
+                    # Add one day to make it inclusive
+                    date_to_obj = date_to_obj.replace(hour=23, minute=59, second=59)
+                    query = query.filter(FAQ.created_at <= date_to_obj)
+                except ValueError:
+                    pass
+
+            if created_by:
+                # Search by username or email
+                user_query = User.query.filter(
+                    db.or_(
+                        User.username.ilike(f'%{created_by}%'),
+                        User.email.ilike(f'%{created_by}%')
+                    )
+                ).first()
+                if user_query:
+                    query = query.filter_by(created_by=user_query.id)
+
+            if has_attachments:
+                query = query.join(Attachment).filter(Attachment.id.isnot(None)).distinct()
+
+            if min_rating and min_rating > 0:
+                # Join with ratings and filter by average rating
+                query = query.outerjoin(FAQRating).group_by(FAQ.id).having(
+                    db.func.avg(FAQRating.rating) >= min_rating
                 )
-            )
 
-        if tags:
-            for tag in tags:
-                if tag.strip():
-                    query = query.filter(FAQ.tags.ilike(f'%{tag.strip()}%'))
-
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
-                query = query.filter(FAQ.created_at >= date_from_obj)
-            except ValueError:
-                pass
-
-        if date_to:
-            try:
-                date_to_obj = datetime.strptime(date_to, '%Y-%m-%d')
-                # Add one day to make it inclusive
-                date_to_obj = date_to_obj.replace(hour=23, minute=59, second=59)
-                query = query.filter(FAQ.created_at <= date_to_obj)
-            except ValueError:
-                pass
-
-        if created_by:
-            # Search by username or email
-            user_query = User.query.filter(
-                db.or_(
-                    User.username.ilike(f'%{created_by}%'),
-                    User.email.ilike(f'%{created_by}%')
+            # Apply sorting
+            if sort_by == 'newest':
+                query = query.order_by(FAQ.created_at.desc())
+            elif sort_by == 'oldest':
+                query = query.order_by(FAQ.created_at.asc())
+            elif sort_by == 'rating':
+                query = query.outerjoin(FAQRating).group_by(FAQ.id).order_by(
+                    db.func.avg(FAQRating.rating).desc() if sort_order == 'desc' else db.func.avg(FAQRating.rating).asc()
                 )
-            ).first()
-            if user_query:
-                query = query.filter_by(created_by=user_query.id)
+            elif sort_by == 'views':
+                # TODO: View sorting temporarily disabled
+                query = query.order_by(FAQ.created_at.desc() if sort_order == 'desc' else FAQ.created_at.asc())
+            elif fuzzy_ranks is not None and (sort_by == 'relevance' or 'sort_by' not in request.args):
+                # Best fuzzy matches first
+                query = query.order_by(db.case(fuzzy_ranks, value=FAQ.id, else_=len(fuzzy_ranks)))
+            elif sort_by == 'relevance' and search:
+                # Simple relevance scoring based on search term positions
+                query = query.order_by(
+                    FAQ.question.ilike(f'%{search}%').desc(),
+                    FAQ.created_at.desc()
+                )
+            else:
+                # Default sorting by order
+                query = query.order_by(FAQ.order.asc() if sort_order == 'asc' else FAQ.order.desc())
 
-        if has_attachments:
-            query = query.join(Attachment).filter(Attachment.id.isnot(None)).distinct()
+            return query
 
-        if min_rating and min_rating > 0:
-            # Join with ratings and filter by average rating
-            query = query.outerjoin(FAQRating).group_by(FAQ.id).having(
-                db.func.avg(FAQRating.rating) >= min_rating
-            )
-
-        # Apply sorting
-        if sort_by == 'newest':
-            query = query.order_by(FAQ.created_at.desc())
-        elif sort_by == 'oldest':
-            query = query.order_by(FAQ.created_at.asc())
-        elif sort_by == 'rating':
-            query = query.outerjoin(FAQRating).group_by(FAQ.id).order_by(
-                db.func.avg(FAQRating.rating).desc() if sort_order == 'desc' else db.func.avg(FAQRating.rating).asc()
-            )
-        elif sort_by == 'views':
-            # TODO: View sorting temporarily disabled
-            query = query.order_by(FAQ.created_at.desc() if sort_order == 'desc' else FAQ.created_at.asc())
-        elif sort_by == 'relevance' and search:
-            # Simple relevance scoring based on search term positions
-            query = query.order_by(
-                FAQ.question.ilike(f'%{search}%').desc(),
-                FAQ.created_at.desc()
-            )
-        else:
-            # Default sorting by order
-            query = query.order_by(FAQ.order.asc() if sort_order == 'asc' else FAQ.order.desc())
+        query = build_query()
 
         # Paginate
         pagination = query.paginate(
@@ -108,10 +162,41 @@ def get_faqs():
             error_out=False
         )
 
-        faqs = [faq.to_dict() for faq in pagination.items]
+        # Typo tolerance: when the substring search finds nothing, fall back
+        # to the trigram index and rank by similarity. Skipped until this
+        # worker's index has been built in the background.
+        search_mode = 'substring' if search else None
+        if (search and pagination.total == 0 and request.args.get('fuzzy', '1') != '0'
+                and fuzzy_index.ensure_fresh_in_background(
+                    current_app._get_current_object(), current_app.config.get('SUGGEST_REFRESH_SECONDS', 10)
+                )):
+            matches = fuzzy_index.search(
+                search, threshold=current_app.config.get('FUZZY_SIMILARITY_THRESHOLD', 0.3)
+            )
+            if matches:
+                search_mode = 'fuzzy'
+                fuzzy_ranks = {faq_id: position for position, (faq_id, _) in enumerate(matches)}
+                pagination = build_query(fuzzy_ranks).paginate(
+                    page=page,
+                    per_page=per_page,
+                    error_out=False
+                )
+
+        # Ratings for the whole page come from one grouped query
+        stats = {}
+        if fields is None or 'rating_stats' in fields:
+            stats = rating_stats_for(faq.id for faq in pagination.items)
+            tag_response(*[f'faq:{faq.id}' for faq in pagination.items])
+        if min_rating or sort_by == 'rating':
+            # Any rating may change which FAQs are on this page
+            tag_response('ratings')
+
+        faqs = [faq.to_dict(fields=fields, rating_stats=stats.get(faq.id)) for faq in pagination.items]
+        g.response_meta = {'results': pagination.total}
 
         return jsonify({
             'faqs': faqs,
+            'search_mode': search_mode,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -123,9 +208,64 @@ def get_faqs():
         })
 
     except Exception as e:
-        print(f"Error in get_faqs: {e}")
+        current_app.logger.exception('Error in get_faqs')
         return jsonify({'error': 'Failed to fetch FAQs'}), 500
 
+@faq_bp.route('/faqs/suggest', methods=['GET'])
+def suggest_faqs():
+    """Search-as-you-type suggestions served from the in-memory prefix index"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+
+        # No suggestions until this worker's index has been built in the background
+        if not suggest_index.ensure_fresh_in_background(
+            current_app._get_current_object(), current_app.config.get('SUGGEST_REFRESH_SECONDS', 10)
+        ):
+            return jsonify({'suggestions': []})
+        return jsonify({'suggestions': suggest_index.suggest(query, limit)})
+
+    except Exception as e:
+        current_app.logger.exception('Error in suggest_faqs')
+        return jsonify({'error': 'Failed to fetch suggestions'}), 500
+
+def update_related(faq_id):
+    """Queue a refresh of stored recommendations; it runs after the response"""
+    if current_app.config.get('RELATED_FAQS_ENABLED', True):
+        related_refresher.schedule(current_app._get_current_object(), faq_id)
+
+def find_duplicates(question, tags, exclude_id=None):
+    """Likely duplicates of a question among active FAQs (LSH lookup).
+
+    Empty until this worker's index has been built in the background.
+    """
+    if not duplicate_index.ensure_fresh_in_background(
+        current_app._get_current_object(), current_app.config.get('SUGGEST_REFRESH_SECONDS', 10)
+    ):
+        return []
+    return duplicate_index.find(
+        question, tags, exclude_id=exclude_id,
+        threshold=current_app.config.get('DUPLICATE_SIMILARITY_THRESHOLD', 0.6)
+    )
+
+@faq_bp.route('/faqs/duplicates', methods=['POST'])
+@jwt_required()
+def check_duplicates():
+    """Dry run: list likely duplicates before creating or editing a FAQ"""
+    try:
+        data = request.get_json()
+        if not data or not data.get('question'):
+            return jsonify({'error': 'Question is required'}), 400
+
+        duplicates = find_duplicates(
+            data['question'], ','.join(data.get('tags', [])), exclude_id=data.get('exclude_id')
+        )
+        return jsonify({'possible_duplicates': duplicates})
+
+    except Exception as e:
+        current_app.logger.exception('Error in check_duplicates')
+        return jsonify({'error': 'Failed to check duplicates'}), 500
+
 @faq_bp.route('/faqs', methods=['POST'])
 @jwt_required()
 def create_faq():
@@ -144,17 +284,25 @@ def create_faq():
             order=data.get('order', 0),
             created_by=current_user_id
         )
+        render_faq_answer(faq)
 
         db.session.add(faq)
+        db.session.flush()
+        publish('faq', id=faq.id, action='created', version=faq.updated_at.isoformat())
         db.session.commit()
+        duplicates = find_duplicates(faq.question, faq.tags, exclude_id=faq.id)
+        faq_changed(faq)
+        update_related(faq.id)
+        response_cache.clear()
 
-        return jsonify(faq.to_dict()), 201
+        return jsonify(dict(faq.to_dict(), possible_duplicates=duplicates)), 201
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create FAQ'}), 500
 
 @faq_bp.route('/faqs/<int:faq_id>', methods=['GET'])
+@cached_response
 def get_faq(faq_id):
     try:
         faq = FAQ.query.get(faq_id)
@@ -165,11 +313,36 @@ def get_faq(faq_id):
         # faq.view_count = (faq.view_count or 0) + 1
         # db.session.commit()
 
-        return jsonify(faq.to_dict())
+        tag_response(f'faq:{faq.id}')
+        return jsonify(faq.to_dict(fields=parse_fields(request.args)))
 
     except Exception as e:
         return jsonify({'error': 'Failed to fetch FAQ'}), 500
 
+@faq_bp.route('/faqs/<int:faq_id>/related', methods=['GET'])
+@cached_response
+def get_related_faqs(faq_id):
+    try:
+        limit = min(max(request.args.get('limit', 5, type=int), 1), 20)
+
+        rows = db.session.query(FAQ, FAQRelated.score).join(
+            FAQRelated, FAQRelated.related_faq_id == FAQ.id
+        ).filter(
+            FAQRelated.faq_id == faq_id,
+            FAQ.is_active == True
+        ).options(
+            load_only(FAQ.id, FAQ.question, FAQ.category, FAQ.tags)
+        ).order_by(FAQRelated.rank.asc()).limit(limit).all()
+
+        return jsonify([
+            dict(faq.to_dict(fields=('id', 'question', 'category', 'tags')), score=score)
+            for faq, score in rows
+        ])
+
+    except Exception as e:
+        current_app.logger.exception('Error in get_related_faqs')
+        return jsonify({'error': 'Failed to fetch related FAQs'}), 500
+
 @faq_bp.route('/faqs/<int:faq_id>', methods=['PUT'])
 @jwt_required()
 def update_faq(faq_id):
@@ -189,6 +362,7 @@ def update_faq(faq_id):
             faq.question = data['question']
         if 'answer' in data:
             faq.answer = data['answer']
+            render_faq_answer(faq)
         if 'category' in data:
             faq.category = data['category']
         if 'tags' in data:
@@ -199,9 +373,17 @@ def update_faq(faq_id):
             faq.is_active = data['is_active']
 
         faq.updated_at = datetime.utcnow()
+        publish('faq', id=faq.id, action='updated', version=faq.updated_at.isoformat())
 
         db.session.commit()
-        return jsonify(faq.to_dict())
+        faq_changed(faq)
+        update_related(faq.id)
+        response_cache.clear()
+
+        result = faq.to_dict()
+        if 'question' in data or 'tags' in data:
+            result['possible_duplicates'] = find_duplicates(faq.question, faq.tags, exclude_id=faq.id)
+        return jsonify(result)
 
     except Exception as e:
         db.session.rollback()
@@ -220,8 +402,12 @@ def delete_faq(faq_id):
         # Soft delete
         faq.is_active = False
         faq.updated_at = datetime.utcnow()
+        publish('faq', id=faq.id, action='deleted', version=faq.updated_at.isoformat())
 
         db.session.commit()
+        faq_removed(faq.id)
+        update_related(faq.id)
+        response_cache.clear()
         return jsonify({'message': 'FAQ deleted successfully'})
 
     except Exception as e:
@@ -229,9 +415,17 @@ def delete_faq(faq_id):
         return jsonify({'error': 'Failed to delete FAQ'}), 500
 
 @faq_bp.route('/categories', methods=['GET'])
+@cached_response
 def get_categories():
     try:
         categories = Category.query.filter_by(is_active=True).order_by(Category.order.asc()).all()
+
+        # ?with_stats=1 adds faq_count, average_rating, total_ratings and last_updated
+        if request.args.get('with_stats') in ('1', 'true'):
+            stats = category_stats()
+            tag_response('ratings')
+            return jsonify([cat.to_dict(stats=stats.get(cat.name, {})) for cat in categories])
+
         return jsonify([cat.to_dict() for cat in categories])
 
     except Exception as e:
@@ -260,7 +454,10 @@ def create_category():
         )
 
         db.session.add(category)
+        db.session.flush()
+        publish('category', id=category.id, action='created')
         db.session.commit()
+        response_cache.clear()
 
         return jsonify(category.to_dict()), 201
 
@@ -296,7 +493,9 @@ def update_category(category_id):
         if 'is_active' in data:
             category.is_active = data['is_active']
 
+        publish('category', id=category.id, action='updated')
         db.session.commit()
+        response_cache.clear()
         return jsonify(category.to_dict())
 
     except Exception as e:
@@ -322,7 +521,9 @@ def delete_category(category_id):
 
         # Soft delete
         category.is_active = False
+        publish('category', id=category.id, action='deleted')
         db.session.commit()
+        response_cache.clear()
         return jsonify({'message': 'Category deleted successfully'})
 
     except Exception as e:
@@ -338,6 +539,7 @@ def get_stats():
         total_ratings = db.session.query(FAQRating).count()
         total_feedbacks = db.session.query(FAQFeedback).count()
         total_attachments = db.session.query(Attachment).count()
+        days = min(max(request.args.get('days', 7, type=int), 1), 365)
 
         # Simple stats - avoid complex queries for now
         return jsonify({
@@ -348,13 +550,17 @@ def get_stats():
                 'total_feedbacks': total_feedbacks,
                 'total_attachments': total_attachments
             },
-            'category_breakdown': [],
+            'category_breakdown': [
+                {'category': name, 'count': stats['faq_count']}
+                for name, stats in sorted(category_stats().items())
+            ],
             'monthly_stats': [],
             'top_rated': [],
             'most_viewed': [],
-            'recent_activity': []
+            'recent_activity': [],
+            'search': search_summary(days)
         })
 
     except Exception as e:
-        print(f"Stats error: {e}")
+        current_app.logger.exception('Stats error')
         return jsonify({'error': 'Failed to fetch stats'}), 500
\ No newline at end of file
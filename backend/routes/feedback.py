@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from models import db, FAQRating, FAQFeedback, FAQ
+from models import db, FAQRating, FAQFeedback, FAQ, User
+from cache import response_cache
+from events import publish
+from fulltext import feedback_text_filter
 from datetime import datetime
+import base64
+import binascii
 import ipaddress
 
 feedback_bp = Blueprint('feedback', __name__)
@@ -49,8 +54,7 @@ def add_faq_rating(faq_id):
             # Update existing rating
             existing_rating.rating = rating
             existing_rating.created_at = datetime.utcnow()
-            db.session.commit()
-            rating_data = existing_rating.to_dict()
+            rating_row = existing_rating
         else:
             # Create new rating
             new_rating = FAQRating(
@@ -60,8 +64,9 @@ def add_faq_rating(faq_id):
                 ip_address=client_ip
             )
             db.session.add(new_rating)
-            db.session.commit()
-            rating_data = new_rating.to_dict()
+            rating_row = new_rating
+        db.session.flush()
+        rating_data = rating_row.to_dict()
 
         # Return updated rating stats
         ratings = [r.rating for r in faq.ratings]
@@ -70,13 +75,20 @@ def add_faq_rating(faq_id):
         for r in ratings:
             rating_dist[r] += 1
 
+        stats = {
+            'average_rating': round(avg_rating, 1),
+            'total_ratings': len(ratings),
+            'rating_distribution': rating_dist
+        }
+        # Same transaction as the rating, so a saved rating always has its event
+        publish('rating', faq_id=faq_id, stats=stats)
+        db.session.commit()
+        # Only pages that show this FAQ's ratings or depend on rating order
+        response_cache.invalidate(f'faq:{faq_id}', 'ratings')
+
         return jsonify({
             'rating': rating_data,
-            'stats': {
-                'average_rating': round(avg_rating, 1),
-                'total_ratings': len(ratings),
-                'rating_distribution': rating_dist
-            }
+            'stats': stats
         }), 200
 
     except Exception as e:
@@ -126,6 +138,8 @@ def add_faq_feedback(faq_id):
         )
 
         db.session.add(new_feedback)
+        db.session.flush()
+        publish('feedback', id=new_feedback.id, faq_id=faq_id, is_helpful=new_feedback.is_helpful)
         db.session.commit()
 
         return jsonify(new_feedback.to_dict()), 201
@@ -197,4 +211,103 @@ def get_faq_feedbacks(faq_id):
         }), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+def encode_cursor(created_at, feedback_id):
+    raw = f'{created_at.isoformat()}|{feedback_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    created_at, feedback_id = raw.split('|')
+    return datetime.fromisoformat(created_at), int(feedback_id)
+
+@feedback_bp.route('/feedbacks', methods=['GET'])
+@jwt_required()
+def get_all_feedbacks():
+    """Feedback across all FAQs, newest first (admin only).
+
+    Uses keyset pagination on (created_at, id): pass the returned
+    ``next_cursor`` as ``cursor`` to get the next page.
+    """
+    try:
+        user = db.session.get(User, int(get_jwt_identity()))
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Admin access required'}), 403
+
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        cursor = request.args.get('cursor')
+        is_helpful = request.args.get('is_helpful')
+        category = request.args.get('category')
+        faq_id = request.args.get('faq_id', type=int)
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        search = request.args.get('q', '').strip()
+
+        query = db.session.query(
+            FAQFeedback.id, FAQFeedback.faq_id, FAQFeedback.rating_id,
+            FAQFeedback.feedback_text, FAQFeedback.contact_email, FAQFeedback.user_id,
+            FAQFeedback.ip_address, FAQFeedback.is_helpful, FAQFeedback.created_at,
+            FAQ.question, FAQ.category
+        ).join(FAQ, FAQ.id == FAQFeedback.faq_id)
+
+        if is_helpful in ('true', 'false'):
+            query = query.filter(FAQFeedback.is_helpful == (is_helpful == 'true'))
+
+        if category and category != 'all':
+            query = query.filter(FAQ.category == category)
+
+        if faq_id:
+            query = query.filter(FAQFeedback.faq_id == faq_id)
+
+        try:
+            if date_from:
+                query = query.filter(FAQFeedback.created_at >= datetime.strptime(date_from, '%Y-%m-%d'))
+            if date_to:
+                date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+                query = query.filter(FAQFeedback.created_at <= date_to_obj)
+        except ValueError:
+            return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+
+        if search:
+            condition = feedback_text_filter(search)
+            if condition is not None:
+                query = query.filter(condition)
+
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = decode_cursor(cursor)
+            except (ValueError, UnicodeDecodeError, binascii.Error):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(db.or_(
+                FAQFeedback.created_at < cursor_created_at,
+                db.and_(FAQFeedback.created_at == cursor_created_at, FAQFeedback.id < cursor_id)
+            ))
+
+        rows = query.order_by(FAQFeedback.created_at.desc(), FAQFeedback.id.desc())\
+            .limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        return jsonify({
+            'feedbacks': [
+                {
+                    'id': row.id,
+                    'faq_id': row.faq_id,
+                    'faq_question': row.question,
+                    'faq_category': row.category,
+                    'rating_id': row.rating_id,
+                    'feedback_text': row.feedback_text,
+                    'contact_email': row.contact_email,
+                    'user_id': row.user_id,
+                    'ip_address': row.ip_address,
+                    'is_helpful': row.is_helpful,
+                    'created_at': row.created_at.isoformat()
+                }
+                for row in rows
+            ],
+            'next_cursor': encode_cursor(rows[-1].created_at, rows[-1].id) if has_next else None
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,11 +1,14 @@
+import hashlib
 import os
 import uuid
-from flask import request, jsonify, send_from_directory
+from datetime import datetime, timedelta
+from flask import request, jsonify, send_from_directory, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
-from PIL import Image
 import mimetypes
-from models import db, Attachment
+from models import db, Attachment, UploadSession
+from cache import response_cache
+from events import publish
 
 ALLOWED_EXTENSIONS = {
     'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'bmp', 'svg', 'webp',
@@ -28,6 +31,72 @@ def get_file_type(mime_type):
     else:
         return 'other'
 
+def describe_upload(original_filename):
+    """File type, mime type, target directory and stored name of an upload"""
+    # Generate unique filename
+    file_extension = original_filename.rsplit('.', 1)[1].lower()
+    unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
+
+    # Determine upload directory and mime type
+    mime_type, _ = mimetypes.guess_type(original_filename)
+    if not mime_type:
+        # Fallback based on extension
+        if file_extension in ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'svg', 'webp']:
+            mime_type = f'image/{file_extension}'
+        elif file_extension == 'pdf':
+            mime_type = 'application/pdf'
+        else:
+            mime_type = 'application/octet-stream'
+
+    file_type = get_file_type(mime_type)
+
+    if file_type == 'image':
+        upload_dir = 'uploads/images'
+    else:
+        upload_dir = 'uploads/documents'
+
+    return file_type, mime_type, upload_dir, unique_filename
+
+def save_attachment(original_filename, unique_filename, file_path, file_size, mime_type, file_type,
+                    process_images=True):
+    """Post-process a stored file and record it; returns the API representation"""
+    # Process images
+    if file_type == 'image' and process_images:
+        try:
+            from PIL import Image  # imported lazily, it is slow to import
+
+            with Image.open(file_path) as img:
+                # Resize large images
+                if img.width > 1920 or img.height > 1080:
+                    img.thumbnail((1920, 1080), Image.Resampling.LANCZOS)
+                    img.save(file_path, optimize=True, quality=85)
+        except Exception as e:
+            print(f"Error processing image: {e}")
+
+    # Save to database
+    attachment = Attachment(
+        filename=unique_filename,
+        original_filename=original_filename,
+        file_path=file_path,
+        file_size=file_size,
+        mime_type=mime_type,
+        file_type=file_type
+    )
+    db.session.add(attachment)
+    db.session.flush()
+    publish('attachment', id=attachment.id, faq_id=attachment.faq_id, action='created')
+    db.session.commit()
+
+    return {
+        'id': attachment.id,
+        'filename': unique_filename,
+        'original_filename': original_filename,
+        'file_type': file_type,
+        'mime_type': mime_type,
+        'file_size': file_size,
+        'url': f'/api/uploads/{unique_filename}'
+    }
+
 @jwt_required()
 def upload_file():
     try:
@@ -49,28 +118,8 @@ def upload_file():
         if file_size > MAX_FILE_SIZE:
             return jsonify({'error': 'File too large'}), 400
 
-        # Generate unique filename
         original_filename = secure_filename(file.filename)
-        file_extension = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-
-        # Determine upload directory and mime type
-        mime_type, _ = mimetypes.guess_type(original_filename)
-        if not mime_type:
-            # Fallback based on extension
-            if file_extension in ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'svg', 'webp']:
-                mime_type = f'image/{file_extension}'
-            elif file_extension == 'pdf':
-                mime_type = 'application/pdf'
-            else:
-                mime_type = 'application/octet-stream'
-
-        file_type = get_file_type(mime_type)
-
-        if file_type == 'image':
-            upload_dir = 'uploads/images'
-        else:
-            upload_dir = 'uploads/documents'
+        file_type, mime_type, upload_dir, unique_filename = describe_upload(original_filename)
 
         # Create directory if it doesn't exist
         os.makedirs(upload_dir, exist_ok=True)
@@ -79,38 +128,8 @@ def upload_file():
         file_path = os.path.join(upload_dir, unique_filename)
         file.save(file_path)
 
-        # Process images
-        if file_type == 'image':
-            try:
-                with Image.open(file_path) as img:
-                    # Resize large images
-                    if img.width > 1920 or img.height > 1080:
-                        img.thumbnail((1920, 1080), Image.Resampling.LANCZOS)
-                        img.save(file_path, optimize=True, quality=85)
-            except Exception as e:
-                print(f"Error processing image: {e}")
-
-        # Save to database
-        attachment = Attachment(
-            filename=unique_filename,
-            original_filename=original_filename,
-            file_path=file_path,
-            file_size=file_size,
-            mime_type=mime_type,
-            file_type=file_type
-        )
-        db.session.add(attachment)
-        db.session.commit()
-
-        return jsonify({
-            'id': attachment.id,
-            'filename': unique_filename,
-            'original_filename': original_filename,
-            'file_type': file_type,
-            'mime_type': mime_type,
-            'file_size': file_size,
-            'url': f'/api/uploads/{unique_filename}'
-        }), 200
+        return jsonify(save_attachment(original_filename, unique_filename, file_path,
+                                       file_size, mime_type, file_type)), 200
 
     except Exception as e:
         db.session.rollback()
@@ -141,11 +160,216 @@ def delete_file(file_id):
             os.remove(attachment.file_path)
 
         # Delete from database
+        publish('attachment', id=attachment.id, faq_id=attachment.faq_id, action='deleted')
         db.session.delete(attachment)
         db.session.commit()
+        response_cache.clear()
 
         return jsonify({'message': 'File deleted successfully'}), 200
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+# Chunked uploads: POST /api/upload/chunked starts a session, each
+# PUT /api/upload/chunked/<id>?offset=N appends one chunk (checked against
+# its X-Chunk-SHA256 header) and POST .../complete turns the file into an
+# attachment. GET .../<id> returns the acknowledged offset to resume from.
+# Chunks are written straight into the partial file at their offset and
+# only their hashes are kept, so completing never re-reads the file.
+
+PARTIAL_UPLOAD_DIR = 'uploads/partial'
+MIN_CHUNK_SIZE = 256 * 1024
+STREAM_BUFFER_SIZE = 64 * 1024
+
+def partial_path(upload_id):
+    return os.path.join(PARTIAL_UPLOAD_DIR, f'{upload_id}.part')
+
+def combined_checksum(chunk_hashes):
+    """SHA-256 over the binary SHA-256 digests of all chunks, in order"""
+    return hashlib.sha256(bytes.fromhex(chunk_hashes)).hexdigest()
+
+def get_upload_session(upload_id):
+    session = db.session.get(UploadSession, upload_id)
+    if not session or session.user_id != int(get_jwt_identity()):
+        return None
+    return session
+
+def discard_upload_session(session):
+    if os.path.exists(partial_path(session.id)):
+        os.remove(partial_path(session.id))
+    db.session.delete(session)
+
+def lost_upload(session):
+    """Drop a session whose partial file is gone; the client has to start over"""
+    discard_upload_session(session)
+    db.session.commit()
+    return jsonify({'error': 'Upload data is gone, start a new upload'}), 410
+
+def purge_stale_uploads():
+    """Drop sessions that saw no chunk within UPLOAD_SESSION_TTL_HOURS"""
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config.get('UPLOAD_SESSION_TTL_HOURS', 24))
+    for session in UploadSession.query.filter(UploadSession.updated_at < cutoff).limit(100):
+        discard_upload_session(session)
+    db.session.commit()
+
+@jwt_required()
+def start_chunked_upload():
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename') or ''
+        size = data.get('size')
+
+        if not allowed_file(filename):
+            return jsonify({'error': 'File type not allowed'}), 400
+        # bool is an int subclass; JSON true is not a size
+        if isinstance(size, bool) or not isinstance(size, int) or size <= 0:
+            return jsonify({'error': 'File size is required'}), 400
+
+        max_size = current_app.config.get('CHUNKED_UPLOAD_MAX_SIZE', 1024 * 1024 * 1024)
+        if size > max_size:
+            return jsonify({'error': 'File too large', 'max_size': max_size}), 400
+
+        max_chunk = current_app.config.get('UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024)
+        chunk_size = data.get('chunk_size') or current_app.config.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+        if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size <= 0:
+            return jsonify({'error': 'chunk_size must be a positive integer'}), 400
+        chunk_size = min(max(chunk_size, MIN_CHUNK_SIZE), max_chunk)
+
+        purge_stale_uploads()
+
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            user_id=int(get_jwt_identity()),
+            original_filename=secure_filename(filename),
+            total_size=size,
+            chunk_size=chunk_size
+        )
+        os.makedirs(PARTIAL_UPLOAD_DIR, exist_ok=True)
+        open(partial_path(session.id), 'wb').close()
+        db.session.add(session)
+        db.session.commit()
+
+        return jsonify(session.to_dict()), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jwt_required()
+def get_chunked_upload(upload_id):
+    session = get_upload_session(upload_id)
+    if not session:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify(session.to_dict())
+
+@jwt_required()
+def upload_chunk(upload_id):
+    try:
+        session = get_upload_session(upload_id)
+        if not session:
+            return jsonify({'error': 'Upload not found'}), 404
+
+        offset = request.args.get('offset', type=int)
+        if offset != session.received:
+            # Already acknowledged or out of order: tell the client where to resume
+            return jsonify({'error': 'Unexpected offset', 'offset': session.received}), 409
+
+        expected = (request.headers.get('X-Chunk-SHA256') or '').lower()
+        if len(expected) != 64:
+            return jsonify({'error': 'X-Chunk-SHA256 header is required'}), 400
+
+        limit = min(session.chunk_size, session.total_size - offset)
+        digest = hashlib.sha256()
+        written = 0
+        try:
+            partial = open(partial_path(session.id), 'r+b')
+        except FileNotFoundError:
+            return lost_upload(session)
+        with partial as f:
+            f.seek(offset)
+            while True:
+                block = request.stream.read(STREAM_BUFFER_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if written > limit:
+                    return jsonify({'error': 'Chunk too large', 'offset': session.received}), 413
+                digest.update(block)
+                f.write(block)
+
+        if written == 0:
+            return jsonify({'error': 'Empty chunk', 'offset': session.received}), 400
+        if digest.hexdigest() != expected:
+            return jsonify({'error': 'Checksum mismatch', 'offset': session.received}), 422
+
+        # Conditional update: a concurrent retry of the same chunk acknowledges it only once
+        acknowledged = UploadSession.query.filter_by(id=session.id, received=offset).update({
+            'received': offset + written,
+            'chunk_hashes': session.chunk_hashes + digest.hexdigest(),
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if not acknowledged:
+            db.session.refresh(session)
+            return jsonify({'error': 'Unexpected offset', 'offset': session.received}), 409
+
+        return jsonify({'offset': offset + written, 'complete': offset + written == session.total_size})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jwt_required()
+def complete_chunked_upload(upload_id):
+    try:
+        session = get_upload_session(upload_id)
+        if not session:
+            return jsonify({'error': 'Upload not found'}), 404
+        if session.received != session.total_size:
+            return jsonify({'error': 'Upload incomplete', 'offset': session.received}), 409
+
+        data = request.get_json(silent=True) or {}
+        checksum = combined_checksum(session.chunk_hashes)
+        if data.get('checksum') and data['checksum'].lower() != checksum:
+            return jsonify({'error': 'Checksum mismatch', 'checksum': checksum}), 422
+
+        file_type, mime_type, upload_dir, unique_filename = describe_upload(session.original_filename)
+        os.makedirs(upload_dir, exist_ok=True)
+        file_path = os.path.join(upload_dir, unique_filename)
+
+        # A dropped request may have left bytes past the end; then move the
+        # partial file into place without copying it
+        try:
+            with open(partial_path(session.id), 'r+b') as f:
+                f.truncate(session.total_size)
+            os.replace(partial_path(session.id), file_path)
+        except FileNotFoundError:
+            return lost_upload(session)
+
+        original_filename, file_size = session.original_filename, session.total_size
+        db.session.delete(session)
+        # Large images are stored as uploaded: resizing would re-read and
+        # rewrite up to CHUNKED_UPLOAD_MAX_SIZE inside this request
+        result = save_attachment(original_filename, unique_filename, file_path,
+                                 file_size, mime_type, file_type, process_images=False)
+        result['checksum'] = checksum
+        return jsonify(result), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@jwt_required()
+def abort_chunked_upload(upload_id):
+    try:
+        session = get_upload_session(upload_id)
+        if not session:
+            return jsonify({'error': 'Upload not found'}), 404
+        discard_upload_session(session)
+        db.session.commit()
+        return jsonify({'message': 'Upload cancelled'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
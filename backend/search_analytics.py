@@ -0,0 +1,275 @@
+"""Search query analytics with bounded memory.
+
+``get_faqs`` is wrapped in ``tracked_search``, which records every listing
+request. Nothing is written per request: each worker keeps a count-min
+sketch plus a small top-k table of heavy hitters per kind (search terms,
+zero-result terms and filter combinations) and a flusher thread merges them
+into the daily ``search_stat`` table every ``SEARCH_ANALYTICS_FLUSH_SECONDS``.
+Days are UTC, like every other timestamp.
+
+Counts are count-min estimates, so they may overestimate a term slightly
+but never underestimate it. Result and latency totals of a term are only
+accumulated while it is in the top-k table.
+"""
+import atexit
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, g, request
+from sqlalchemy.exc import IntegrityError
+from models import db, SearchStat
+
+MAX_TERM_LENGTH = 200
+
+# get_faqs arguments that count as filters, with their "unset" value
+FILTER_ARGS = {
+    'category': 'all',
+    'tags': '',
+    'date_from': '',
+    'date_to': '',
+    'created_by': '',
+    'has_attachments': '',
+    'min_rating': '',
+}
+
+def normalize_term(text):
+    return ' '.join((text or '').lower().split())[:MAX_TERM_LENGTH]
+
+def filter_combination(args):
+    """Names of the filters used by a request, e.g. 'category+tags'"""
+    used = [name for name, unset in FILTER_ARGS.items() if args.get(name, unset) not in (unset, None)]
+    return '+'.join(used) or 'none'
+
+class CountMinSketch:
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def add(self, key, count=1):
+        """Add ``count`` occurrences of key and return its estimated total"""
+        # Row indexes come from one 128-bit hash (double hashing)
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        estimate = None
+        for i, row in enumerate(self.rows):
+            bucket = (h1 + i * h2) % self.width
+            row[bucket] += count
+            if estimate is None or row[bucket] < estimate:
+                estimate = row[bucket]
+        return estimate
+
+class HeavyHitters:
+    """Top-k terms by count-min estimate, with per-term aggregates"""
+
+    def __init__(self, k, width, depth):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.entries = {}  # term -> [count, zero_results, total_results, total_latency_ms]
+        # Lower bound of the smallest count in a full table; counts only
+        # grow, so most misses are rejected without scanning the table
+        self.floor = 0
+
+    def add(self, term, results, latency_ms):
+        estimate = self.sketch.add(term)
+        entry = self.entries.get(term)
+        if entry is None:
+            if len(self.entries) >= self.k:
+                if estimate <= self.floor:
+                    return
+                smallest = min(self.entries, key=lambda t: self.entries[t][0])
+                self.floor = self.entries[smallest][0]
+                if self.floor >= estimate:
+                    return
+                del self.entries[smallest]
+            entry = self.entries[term] = [0, 0, 0, 0.0]
+        entry[0] = estimate
+        entry[1] += 1 if results == 0 else 0
+        entry[2] += results
+        entry[3] += latency_ms
+
+class SearchWindow:
+    """Everything recorded between two flushes"""
+
+    KINDS = ('query', 'zero_result', 'filters')
+
+    def __init__(self, k, width, depth):
+        self.trackers = {kind: HeavyHitters(k, width, depth) for kind in self.KINDS}
+        self.total = [0, 0, 0, 0.0]
+
+    def add(self, term, filters, results, latency_ms):
+        if term:
+            self.trackers['query'].add(term, results, latency_ms)
+            if results == 0:
+                self.trackers['zero_result'].add(term, results, latency_ms)
+            self.total[0] += 1
+            self.total[1] += 1 if results == 0 else 0
+            self.total[2] += results
+            self.total[3] += latency_ms
+        self.trackers['filters'].add(filters, results, latency_ms)
+
+    def rows(self):
+        for kind, tracker in self.trackers.items():
+            for term, values in tracker.entries.items():
+                yield kind, term, values
+        if self.total[0]:
+            yield 'total', '', self.total
+
+class SearchAnalytics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._window = None
+        self._thread = None
+        self._app = None
+        self._settings = None
+
+    def _new_window(self):
+        return SearchWindow(*self._settings)
+
+    def pending(self):
+        """Rows waiting for the next flush"""
+        with self._lock:
+            return sum(1 for _ in self._window.rows()) if self._window else 0
+
+    def record(self, app, term, filters, results, latency_ms):
+        with self._lock:
+            if self._window is None:
+                self._app = app
+                self._settings = (
+                    app.config.get('SEARCH_ANALYTICS_TOP_K', 100),
+                    app.config.get('SEARCH_ANALYTICS_SKETCH_WIDTH', 2048),
+                    app.config.get('SEARCH_ANALYTICS_SKETCH_DEPTH', 4),
+                )
+                self._window = self._new_window()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='search-analytics', daemon=True)
+                self._thread.start()
+            self._window.add(term, filters, results, latency_ms)
+
+    def _run(self):
+        interval = self._app.config.get('SEARCH_ANALYTICS_FLUSH_SECONDS', 60)
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                self._app.logger.exception('Search analytics flush failed')
+
+    def flush(self):
+        """Merge the current window into search_stat and start a new one"""
+        with self._lock:
+            window = self._window
+            if window is None:
+                return 0
+            self._window = self._new_window()
+
+        rows = list(window.rows())
+        if not rows:
+            return 0
+        today = datetime.utcnow().date()
+        with self._app.app_context():
+            try:
+                for attempt in range(2):
+                    try:
+                        _merge_rows(today, rows)
+                        break
+                    except IntegrityError:
+                        # Another worker inserted one of the rows first
+                        db.session.rollback()
+                        if attempt:
+                            raise
+                retention = self._app.config.get('SEARCH_ANALYTICS_RETENTION_DAYS', 90)
+                if retention:
+                    SearchStat.query.filter(SearchStat.day < today - timedelta(days=retention))\
+                        .delete(synchronize_session=False)
+                    db.session.commit()
+            finally:
+                db.session.remove()
+        return len(rows)
+
+def _merge_rows(day, rows):
+    existing = {
+        (stat.kind, stat.term): stat
+        for stat in SearchStat.query.filter_by(day=day).filter(
+            SearchStat.term.in_(list({term for _, term, _ in rows}))
+        )
+    }
+    for kind, term, (count, zero_results, total_results, latency_ms) in rows:
+        stat = existing.get((kind, term))
+        if stat is None:
+            stat = SearchStat(day=day, kind=kind, term=term, count=0, zero_results=0,
+                              total_results=0, total_latency_ms=0.0)
+            db.session.add(stat)
+        stat.count += count
+        stat.zero_results += zero_results
+        stat.total_results += total_results
+        stat.total_latency_ms += latency_ms
+    db.session.commit()
+
+search_analytics = SearchAnalytics()
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        search_analytics.flush()
+    except Exception:
+        pass
+
+def tracked_search(view):
+    """Record each listing request, including response cache hits.
+
+    Place above ``@cached_response``; the view reports its result count in
+    ``g.response_meta['results']``, which the cache keeps with the entry.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        response = view(*args, **kwargs)
+        app = current_app._get_current_object()
+        meta = g.get('response_meta')
+        if meta and app.config.get('SEARCH_ANALYTICS_ENABLED', True):
+            search_analytics.record(
+                app, normalize_term(request.args.get('search')), filter_combination(request.args),
+                meta['results'], (time.perf_counter() - start) * 1000
+            )
+        return response
+
+    return wrapper
+
+def search_summary(days=7, limit=10):
+    """Top queries, zero-result queries and filter combinations for /api/stats"""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    count = db.func.sum(SearchStat.count)
+    zero_results = db.func.sum(SearchStat.zero_results)
+    total_results = db.func.sum(SearchStat.total_results)
+    latency = db.func.sum(SearchStat.total_latency_ms)
+
+    def top(kind, order):
+        rows = db.session.query(SearchStat.term, count, zero_results, total_results, latency)\
+            .filter(SearchStat.kind == kind, SearchStat.day >= since)\
+            .group_by(SearchStat.term).order_by(order.desc(), SearchStat.term).limit(limit).all()
+        return [{
+            'term': term,
+            'count': n,
+            'zero_results': zeros,
+            'avg_results': round(results / n, 1) if n else 0,
+            'avg_latency_ms': round(ms / n, 1) if n else 0,
+        } for term, n, zeros, results, ms in rows]
+
+    totals = db.session.query(count, zero_results, latency)\
+        .filter(SearchStat.kind == 'total', SearchStat.day >= since).one()
+    searches = totals[0] or 0
+    return {
+        'days': days,
+        'total_searches': searches,
+        'zero_result_searches': totals[1] or 0,
+        'avg_latency_ms': round(totals[2] / searches, 1) if searches else 0,
+        'top_queries': top('query', count),
+        'top_zero_result_queries': [
+            {'term': row['term'], 'count': row['count']} for row in top('zero_result', count)
+        ],
+        'top_filters': top('filters', count),
+    }
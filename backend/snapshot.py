@@ -0,0 +1,176 @@
+"""Static snapshot export of the public FAQ data.
+
+Writes JSON files that mirror the public API so the frontend can be served
+from a plain file server on offline sites:
+
+    categories.json                      GET /api/categories
+    faqs/<id>.json                       GET /api/faqs/<id>
+    lists/<category|all>/page-<n>.json   GET /api/faqs?category=..&view=summary
+    search-index.json                    questions and tags for client-side search
+    uploads/<filename>                   referenced attachments
+    manifest.json                        change key per exported FAQ
+
+Exports are incremental: FAQ detail files are only rewritten when their
+change key differs from the one recorded in the manifest. The key covers
+the FAQ's updated_at plus its rating stats and attachments, which change
+without touching updated_at. File encoding and writing is spread over a
+process pool.
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from models import FAQ, Category, Attachment, FAQ_FIELDS, FAQ_SUMMARY_FIELDS, rating_stats_for
+
+def write_json(path, data):
+    """Write atomically so a reader never sees a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def _write_batch(jobs):
+    for path, data in jobs:
+        write_json(path, data)
+    return len(jobs)
+
+def _link_or_copy(source, target):
+    if os.path.exists(target) and os.path.getsize(target) == os.path.getsize(source):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return True
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _attachment_ids(faq_ids):
+    """Attachment ids per FAQ, with one query"""
+    ids = defaultdict(list)
+    rows = Attachment.query.with_entities(Attachment.faq_id, Attachment.id)\
+        .filter(Attachment.faq_id.in_(faq_ids)).order_by(Attachment.id.asc())
+    for faq_id, attachment_id in rows:
+        ids[faq_id].append(attachment_id)
+    return ids
+
+def _detail_version(faq, rating_stats, attachment_ids):
+    """Change key of a FAQ's detail file"""
+    embedded = json.dumps([rating_stats, attachment_ids], sort_keys=True)
+    return f'{faq.updated_at.isoformat()}:{hashlib.sha1(embedded.encode()).hexdigest()[:16]}'
+
+def _swap_dir(staging_dir, target_dir):
+    """Replace target_dir with staging_dir; readers never see it empty"""
+    old_dir = f'{target_dir}.old'
+    if os.path.isdir(old_dir):
+        shutil.rmtree(old_dir)
+    if os.path.isdir(target_dir):
+        os.rename(target_dir, old_dir)
+    os.rename(staging_dir, target_dir)
+    if os.path.isdir(old_dir):
+        shutil.rmtree(old_dir)
+
+def _list_pages(name, summaries, per_page):
+    pages = max(1, math.ceil(len(summaries) / per_page))
+    for page in range(1, pages + 1):
+        items = summaries[(page - 1) * per_page:page * per_page]
+        yield page, {
+            'faqs': items,
+            'search_mode': None,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': len(summaries),
+                'pages': pages,
+                'has_next': page < pages,
+                'has_prev': page > 1
+            }
+        }
+
+def export_snapshot(output_dir, per_page=20, workers=None, full=False, batch_size=100):
+    """Export the snapshot and return counts of what was written"""
+    output_dir = os.path.abspath(output_dir)
+    manifest = {} if full else _load_manifest(output_dir)
+    exported = manifest.get('faqs', {})
+
+    faqs = FAQ.query.filter_by(is_active=True).order_by(FAQ.order.asc(), FAQ.id.asc()).all()
+    categories = Category.query.filter_by(is_active=True).order_by(Category.order.asc()).all()
+    faq_ids = [faq.id for faq in faqs]
+    stats = rating_stats_for(faq_ids)
+    attachment_ids = _attachment_ids(faq_ids)
+    versions = {
+        str(faq.id): _detail_version(faq, stats.get(faq.id), attachment_ids.get(faq.id, []))
+        for faq in faqs
+    }
+
+    jobs = []
+    changed = 0
+    for faq in faqs:
+        if exported.get(str(faq.id)) != versions[str(faq.id)]:
+            jobs.append((os.path.join(output_dir, 'faqs', f'{faq.id}.json'),
+                         faq.to_dict(fields=FAQ_FIELDS, rating_stats=stats.get(faq.id))))
+            changed += 1
+
+    # FAQs that were deleted or deactivated since the last export
+    active_ids = {str(faq.id) for faq in faqs}
+    removed = 0
+    for faq_id in set(exported) - active_ids:
+        path = os.path.join(output_dir, 'faqs', f'{faq_id}.json')
+        if os.path.exists(path):
+            os.remove(path)
+        removed += 1
+
+    # Lists and the search index are small; rebuild them every time. Lists
+    # are written to a staging directory that replaces lists/ at the end
+    summaries = [faq.to_dict(fields=FAQ_SUMMARY_FIELDS, rating_stats=stats.get(faq.id)) for faq in faqs]
+    lists_dir = os.path.join(output_dir, 'lists')
+    staging_dir = f'{lists_dir}.new'
+    if os.path.isdir(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    for name in ['all'] + [category.name for category in categories]:
+        items = summaries if name == 'all' else [s for s in summaries if s['category'] == name]
+        for page, data in _list_pages(name, items, per_page):
+            jobs.append((os.path.join(staging_dir, name, f'page-{page}.json'), data))
+
+    jobs.append((os.path.join(output_dir, 'categories.json'), [c.to_dict() for c in categories]))
+    jobs.append((os.path.join(output_dir, 'search-index.json'), [
+        {'id': s['id'], 'question': s['question'], 'category': s['category'], 'tags': s['tags']}
+        for s in summaries
+    ]))
+
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    if workers == 1 or len(batches) <= 1:
+        for batch in batches:
+            _write_batch(batch)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_write_batch, batches))
+    _swap_dir(staging_dir, lists_dir)
+
+    attachments = 0
+    for attachment in Attachment.query.filter(Attachment.faq_id.in_(faq_ids)):
+        if os.path.exists(attachment.file_path):
+            target = os.path.join(output_dir, 'uploads', attachment.filename)
+            attachments += _link_or_copy(attachment.file_path, target)
+
+    write_json(os.path.join(output_dir, 'manifest.json'), {
+        'generated_at': datetime.utcnow().isoformat(),
+        'faqs': versions,
+    })
+
+    return {'faqs_written': changed, 'faqs_removed': removed,
+            'files_written': len(jobs), 'attachments_copied': attachments}
@@ -0,0 +1,112 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from faq_index import FAQIndex, register_index, faq_terms, tokenize
+
+class SuggestIndex(FAQIndex):
+    """In-memory prefix index over active FAQ questions and tags.
+
+    Tokens are kept in a sorted list so every token starting with a prefix
+    is a contiguous slice found with bisect.
+    """
+
+    RESULT_CACHE_SIZE = 1024
+
+    name = 'suggest'
+    fields = ('_tokens', '_postings', '_docs', '_doc_tokens', '_results')
+
+    def __init__(self):
+        super().__init__()
+        # Keystroke prefixes repeat a lot across users; any change clears this
+        self._results = OrderedDict()
+        self._clear()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _clear(self):
+        self._tokens = []
+        self._postings = {}
+        self._docs = {}
+        self._doc_tokens = {}
+        self._results.clear()
+
+    def _add(self, faq):
+        tokens = faq_terms(faq)
+        self._docs[faq.id] = {
+            'id': faq.id,
+            'question': faq.question,
+            'category': faq.category,
+            'order': faq.order or 0,
+            'question_lower': faq.question.lower(),
+        }
+        self._doc_tokens[faq.id] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                insort(self._tokens, token)
+            postings.add(faq.id)
+        self._results.clear()
+
+    def _remove(self, faq_id):
+        self._docs.pop(faq_id, None)
+        for token in self._doc_tokens.pop(faq_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(faq_id)
+            if not postings:
+                del self._postings[token]
+                index = bisect_left(self._tokens, token)
+                if index < len(self._tokens) and self._tokens[index] == token:
+                    del self._tokens[index]
+        self._results.clear()
+
+    def _prefix_matches(self, prefix):
+        ids = set()
+        index = bisect_left(self._tokens, prefix)
+        while index < len(self._tokens) and self._tokens[index].startswith(prefix):
+            ids |= self._postings[self._tokens[index]]
+            index += 1
+        return ids
+
+    def suggest(self, query, limit=8):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        query_lower = ' '.join(tokens)
+        key = (query_lower, limit)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+
+            # Every query token must prefix-match some token of the FAQ;
+            # start from the most selective token to keep intersections small
+            candidate_sets = sorted((self._prefix_matches(t) for t in tokens), key=len)
+            ids = candidate_sets[0]
+            for other in candidate_sets[1:]:
+                ids = ids & other
+                if not ids:
+                    break
+
+            best = heapq.nsmallest(limit, (self._docs[faq_id] for faq_id in ids), key=lambda d: (
+                not d['question_lower'].startswith(query_lower),
+                query_lower not in d['question_lower'],
+                d['order'],
+                d['id'],
+            ))
+            results = [
+                {'id': d['id'], 'question': d['question'], 'category': d['category']}
+                for d in best
+            ]
+
+            self._results[key] = results
+            if len(self._results) > self.RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            return results
+
+suggest_index = register_index(SuggestIndex())
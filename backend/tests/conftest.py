@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Config reads the environment on import, so point it at a scratch database first
+os.environ['DATABASE_URL'] = f'sqlite:///{tempfile.mkdtemp()}/test.db'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from commands import init_db  # noqa: E402
+from models import db  # noqa: E402
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        init_db()
+        yield app
+        db.session.remove()
+        db.drop_all()
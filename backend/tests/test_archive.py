@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from archive import ARCHIVE, archive_deleted_faqs, restore_faqs
+from models import db, FAQ, FAQRating, FAQFeedback
+
+def _deleted_faq(question, faq_id=None):
+    """A soft-deleted FAQ old enough to archive, with a rating and feedback"""
+    faq = FAQ(id=faq_id, question=question, answer='Answer', category='General', is_active=False)
+    db.session.add(faq)
+    db.session.flush()
+    rating = FAQRating(faq_id=faq.id, rating=4, ip_address='127.0.0.1')
+    db.session.add(rating)
+    db.session.flush()
+    db.session.add(FAQFeedback(faq_id=faq.id, rating_id=rating.id, feedback_text=question,
+                               ip_address='127.0.0.1'))
+    db.session.commit()
+    FAQ.query.filter_by(id=faq.id).update({'updated_at': datetime.utcnow() - timedelta(days=60)})
+    db.session.commit()
+    return faq.id, rating.id
+
+def _archived_count(model):
+    return db.session.execute(db.select(db.func.count()).select_from(ARCHIVE[model])).scalar()
+
+def test_archive_reused_ids(app):
+    faq_id, rating_id = _deleted_faq('First')
+    archive_deleted_faqs(30, pause=0)
+
+    # SQLite hands the freed ids out again
+    assert _deleted_faq('Second', faq_id) == (faq_id, rating_id)
+    archive_deleted_faqs(30, pause=0)
+
+    assert FAQ.query.count() == 0
+    assert _archived_count(FAQ) == _archived_count(FAQRating) == _archived_count(FAQFeedback) == 2
+
+def test_restore_latest_copy_under_new_id_when_reused(app):
+    faq_id, _ = _deleted_faq('First')
+    archive_deleted_faqs(30, pause=0)
+    _deleted_faq('Second', faq_id)
+    archive_deleted_faqs(30, pause=0)
+    taken = FAQ(id=faq_id, question='Current', answer='Answer', category='General')
+    db.session.add(taken)
+    db.session.commit()
+
+    restored = restore_faqs([faq_id])
+
+    new_id = restored[faq_id]
+    assert new_id != faq_id
+    faq = db.session.get(FAQ, new_id)
+    assert faq.question == 'Second' and faq.is_active
+    feedback = FAQFeedback.query.filter_by(faq_id=new_id).one()
+    assert feedback.feedback_text == 'Second'
+    assert db.session.get(FAQRating, feedback.rating_id).faq_id == new_id
+    # The older copy stays archived
+    assert _archived_count(FAQ) == _archived_count(FAQRating) == 1
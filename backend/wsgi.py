@@ -0,0 +1,11 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+    waitress-serve --listen=0.0.0.0:5000 wsgi:app
+
+Uses ProductionConfig unless FLASK_CONFIG says otherwise.
+"""
+import os
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
@@ -1,5 +1,6 @@
 import React, { useState, useRef } from 'react';
 import { Upload, X, File, Image, FileText } from 'lucide-react';
+import { uploadService } from '../services/api';
 
 interface UploadedFile {
   id: number;
@@ -15,13 +16,15 @@ interface FileUploadProps {
   onFilesChange: (files: UploadedFile[]) => void;
   accept?: string;
   maxSize?: number;
+  chunkThreshold?: number;
   multiple?: boolean;
 }
 
 const FileUpload: React.FC<FileUploadProps> = ({
   onFilesChange,
   accept = 'image/*,.pdf,.doc,.docx,.txt',
-  maxSize = 10 * 1024 * 1024, // 10MB
+  maxSize = 1024 * 1024 * 1024, // 1GB, the server's CHUNKED_UPLOAD_MAX_SIZE
+  chunkThreshold = 10 * 1024 * 1024, // larger files go up in resumable chunks
   multiple = false
 }) => {
   const [uploadedFiles, setUploadedFiles] = useState<UploadedFile[]>([]);
@@ -29,6 +32,26 @@ const FileUpload: React.FC<FileUploadProps> = ({
   const [error, setError] = useState<string | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
 
+  const uploadDirect = async (file: File): Promise<UploadedFile> => {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch('/api/upload', {
+      method: 'POST',
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
+      },
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.error || 'Upload failed');
+    }
+
+    return response.json();
+  };
+
   const handleFileSelect = async (event: React.ChangeEvent<HTMLInputElement>) => {
     const files = Array.from(event.target.files || []);
     if (files.length === 0) return;
@@ -36,36 +59,17 @@ const FileUpload: React.FC<FileUploadProps> = ({
     setError(null);
     setUploading(true);
 
+    // One file at a time; files uploaded before a failure are kept
+    const uploaded: UploadedFile[] = [];
     try {
-      const formData = new FormData();
-      files.forEach(file => {
-        formData.append('file', file);
-      });
-
-      const response = await fetch('/api/upload', {
-        method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
-        },
-        body: formData,
-      });
-
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.error || 'Upload failed');
-      }
-
-      const uploadedFile = await response.json();
-
-      let newFiles;
-      if (multiple) {
-        newFiles = [...uploadedFiles, uploadedFile];
-      } else {
-        newFiles = [uploadedFile];
+      for (const file of files) {
+        if (file.size > maxSize) {
+          throw new Error(`${file.name} is larger than ${formatFileSize(maxSize)}`);
+        }
+        uploaded.push(file.size > chunkThreshold
+          ? await uploadService.uploadChunked(file)
+          : await uploadDirect(file));
       }
-
-      setUploadedFiles(newFiles);
-      onFilesChange(newFiles);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Upload failed');
     } finally {
@@ -74,6 +78,12 @@ const FileUpload: React.FC<FileUploadProps> = ({
         fileInputRef.current.value = '';
       }
     }
+
+    if (uploaded.length > 0) {
+      const newFiles = multiple ? [...uploadedFiles, ...uploaded] : uploaded.slice(-1);
+      setUploadedFiles(newFiles);
+      onFilesChange(newFiles);
+    }
   };
 
   const removeFile = async (fileToRemove: UploadedFile) => {
@@ -23,7 +23,7 @@ const CategoryManagement: React.FC = () => {
 
   const loadCategories = async () => {
     try {
-      const data = await categoryService.getCategories();
+      const data = await categoryService.getCategories(true);
       setCategories(data);
     } catch (error) {
       console.error('Error loading categories:', error);
@@ -310,6 +310,12 @@ const CategoryManagement: React.FC = () => {
                           <div className="text-sm font-medium text-gray-900 capitalize">
                             {category.name}
                           </div>
+                          {category.faq_count !== undefined && (
+                            <div className="text-xs text-gray-500">
+                              {category.faq_count} FAQ
+                              {category.total_ratings ? ` • ★ ${category.average_rating}` : ''}
+                            </div>
+                          )}
                         </div>
                       </div>
                     </td>
@@ -4,7 +4,7 @@ import { ArrowLeft, ChevronDown, ChevronUp, Tag, FileText, Download, Paperclip,
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 import { faqService, categoryService, feedbackService } from '../services/api';
-import type { FAQ, Category, RatingStats } from '../types';
+import type { FAQ, Category, RatingStats, RelatedFAQ } from '../types';
 import ImageGallery from '../components/ImageGallery';
 import Rating from '../components/Rating';
 import FeedbackForm from '../components/FeedbackForm';
@@ -15,7 +15,7 @@ import CodeBlock from '../components/CodeBlock';
 const FAQDetail: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const [faq, setFaq] = useState<FAQ | null>(null);
-  const [relatedFAQs, setRelatedFAQs] = useState<FAQ[]>([]);
+  const [relatedFAQs, setRelatedFAQs] = useState<RelatedFAQ[]>([]);
   const [loading, setLoading] = useState(true);
   const [categories, setCategories] = useState<Category[]>([]);
   const [ratingStats, setRatingStats] = useState<RatingStats | null>(null);
@@ -41,12 +41,8 @@ const FAQDetail: React.FC = () => {
         setRatingStats(faqData.rating_stats);
       }
 
-      // Load related FAQs (same category)
-      const relatedResponse = await faqService.getFAQs({
-        category: faqData.category,
-        per_page: 5,
-      });
-      setRelatedFAQs(relatedResponse.data.filter(f => f.id !== faqId));
+      // Load related FAQs (precomputed by the backend)
+      setRelatedFAQs(await faqService.getRelatedFAQs(faqId, 5));
     } catch (error) {
       console.error('Error loading FAQ:', error);
     } finally {
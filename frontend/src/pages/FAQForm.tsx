@@ -243,11 +243,10 @@ const FAQForm: React.FC = () => {
             <FileUpload
               onFilesChange={setUploadedFiles}
               accept="image/*,.pdf,.doc,.docx,.txt"
-              maxSize={10 * 1024 * 1024}
               multiple={true}
             />
             <p className="mt-1 text-sm text-gray-500">
-              Upload images, documents, or other files. Images will be automatically optimized.
+              Upload images, documents, or other files. Images up to 10 MB will be automatically optimized.
             </p>
           </div>
 
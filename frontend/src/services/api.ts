@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { FAQ, Category, AuthResponse, User, PaginatedResponse, FAQStats, FAQFormData } from '../types/index';
+import type { FAQ, FAQSuggestion, FAQDuplicate, RelatedFAQ, Category, AuthResponse, User, PaginatedResponse, FAQStats, FAQFormData } from '../types/index';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || '/api';
 
@@ -55,6 +55,8 @@ export const faqService = {
     search?: string;
     page?: number;
     per_page?: number;
+    view?: 'summary' | 'full';
+    fields?: string;
   }): Promise<PaginatedResponse<FAQ>> => {
     const response = await api.get('/faqs', { params });
     return {
@@ -63,8 +65,18 @@ export const faqService = {
     };
   },
 
-  getFAQ: async (id: number): Promise<FAQ> => {
-    const response = await api.get(`/faqs/${id}`);
+  suggest: async (q: string, limit = 8): Promise<FAQSuggestion[]> => {
+    const response = await api.get('/faqs/suggest', { params: { q, limit } });
+    return response.data.suggestions;
+  },
+
+  getRelatedFAQs: async (id: number, limit = 5): Promise<RelatedFAQ[]> => {
+    const response = await api.get(`/faqs/${id}/related`, { params: { limit } });
+    return response.data;
+  },
+
+  getFAQ: async (id: number, format?: 'html'): Promise<FAQ> => {
+    const response = await api.get(`/faqs/${id}`, { params: format ? { format } : undefined });
     return response.data;
   },
 
@@ -73,6 +85,11 @@ export const faqService = {
     return response.data;
   },
 
+  checkDuplicates: async (question: string, tags: string[] = [], excludeId?: number): Promise<FAQDuplicate[]> => {
+    const response = await api.post('/faqs/duplicates', { question, tags, exclude_id: excludeId });
+    return response.data.possible_duplicates;
+  },
+
   updateFAQ: async (id: number, data: Partial<FAQFormData>): Promise<FAQ> => {
     const response = await api.put(`/faqs/${id}`, data);
     return response.data;
@@ -85,8 +102,8 @@ export const faqService = {
 
 // Category services
 export const categoryService = {
-  getCategories: async (): Promise<Category[]> => {
-    const response = await api.get('/categories');
+  getCategories: async (withStats = false): Promise<Category[]> => {
+    const response = await api.get('/categories', { params: withStats ? { with_stats: 1 } : undefined });
     return response.data;
   },
 
@@ -152,6 +169,72 @@ export const feedbackService = {
     const response = await api.get(`/faqs/${faqId}/feedbacks`, { params });
     return response.data;
   },
+
+  // Admin inbox across all FAQs; pass the previous response's next_cursor to page.
+  getAllFeedbacks: async (params?: {
+    cursor?: string;
+    limit?: number;
+    is_helpful?: boolean;
+    category?: string;
+    faq_id?: number;
+    date_from?: string;
+    date_to?: string;
+    q?: string;
+  }) => {
+    const response = await api.get('/feedbacks', { params });
+    return response.data;
+  },
+};
+
+// Chunked, resumable uploads for large attachments
+const sha256Hex = async (data: ArrayBuffer): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+};
+
+export const uploadService = {
+  uploadChunked: async (file: File, onProgress?: (uploaded: number, total: number) => void, retries = 5) => {
+    const { data: upload } = await api.post('/upload/chunked', { filename: file.name, size: file.size });
+    let offset: number = upload.offset;
+    let failures = 0;
+
+    while (offset < file.size) {
+      const chunk = await file.slice(offset, offset + upload.chunk_size).arrayBuffer();
+      try {
+        const response = await api.put(`/upload/chunked/${upload.upload_id}`, chunk, {
+          params: { offset },
+          headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': await sha256Hex(chunk) },
+        });
+        offset = response.data.offset;
+        failures = 0;
+        onProgress?.(offset, file.size);
+      } catch (error: any) {
+        if (++failures > retries) throw error;
+        // Resume from whatever the server acknowledged last
+        const status = await api.get(`/upload/chunked/${upload.upload_id}`);
+        offset = status.data.offset;
+      }
+    }
+
+    const response = await api.post(`/upload/chunked/${upload.upload_id}/complete`);
+    return response.data;
+  },
+};
+
+// Change notifications (server-sent events). Returns a function that closes the stream.
+export type ChangeEventKind = 'faq' | 'category' | 'rating' | 'feedback' | 'attachment';
+
+export const subscribeToChanges = (
+  onEvent: (kind: ChangeEventKind, data: any) => void,
+  kinds: ChangeEventKind[] = ['faq', 'category', 'rating', 'feedback', 'attachment'],
+): (() => void) => {
+  const source = new EventSource(`${API_BASE_URL}/events`);
+  kinds.forEach((kind) => {
+    source.addEventListener(kind, (event) => {
+      onEvent(kind, JSON.parse((event as MessageEvent).data));
+    });
+  });
+  return () => source.close();
 };
 
 // Health check
@@ -3,6 +3,8 @@ export type FAQ = {
   id: number;
   question: string;
   answer: string;
+  answer_html?: string | null;
+  answer_toc?: { level: number; id: string; name: string }[];
   category: string;
   tags: string[];
   is_active: boolean;
@@ -12,6 +14,27 @@ export type FAQ = {
   attachments: FAQAttachment[];
 };
 
+export type FAQSuggestion = {
+  id: number;
+  question: string;
+  category: string;
+};
+
+export type FAQDuplicate = {
+  id: number;
+  question: string;
+  category: string;
+  similarity: number;
+};
+
+export type RelatedFAQ = {
+  id: number;
+  question: string;
+  category: string;
+  tags: string[];
+  score: number;
+};
+
 // Category Types
 export type Category = {
   id: number;
@@ -21,6 +44,11 @@ export type Category = {
   color: string;
   order: number;
   is_active: boolean;
+  // Present when requested with ?with_stats=1
+  faq_count?: number;
+  average_rating?: number;
+  total_ratings?: number;
+  last_updated?: string | null;
 };
 
 // User Types
@@ -66,6 +94,25 @@ export type FAQStats = {
   top_rated: any[];
   most_viewed: any[];
   recent_activity: any[];
+  search: SearchAnalytics;
+};
+
+export type SearchTermStat = {
+  term: string;
+  count: number;
+  zero_results: number;
+  avg_results: number;
+  avg_latency_ms: number;
+};
+
+export type SearchAnalytics = {
+  days: number;
+  total_searches: number;
+  zero_result_searches: number;
+  avg_latency_ms: number;
+  top_queries: SearchTermStat[];
+  top_zero_result_queries: Array<{ term: string; count: number }>;
+  top_filters: SearchTermStat[];
 };
 
 // Form Data Types